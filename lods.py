@@ -1,10 +1,21 @@
 """LOD Management system."""
 import bpy
+import numpy as np
+from bpy.app.handlers import persistent
 from typing import Callable, Optional
 from .sollumz_properties import SollumType, LODLevel, FRAGMENT_TYPES, DRAWABLE_TYPES, SOLLUMZ_UI_NAMES, BOUND_TYPES, BOUND_POLYGON_TYPES, items_from_enums
 from .tools.blenderhelper import get_all_collections, lod_level_enum_flag_prop_factory
 from .sollumz_helper import find_sollumz_parent
 
+# All LOD levels, from highest to lowest detail
+LOD_LEVELS = (LODLevel.VERYHIGH, LODLevel.HIGH,
+              LODLevel.MEDIUM, LODLevel.LOW, LODLevel.VERYLOW)
+# Shared by every enum property listing LOD levels
+LOD_LEVEL_ITEMS = items_from_enums(LODLevel)
+# Sollum types that can be shown in the LOD panel
+LOD_PANEL_TYPES = frozenset((*FRAGMENT_TYPES, *DRAWABLE_TYPES))
+COLLISION_TYPES = frozenset((*BOUND_TYPES, *BOUND_POLYGON_TYPES))
+
 
 class ObjectLODProps(bpy.types.PropertyGroup):
     def update_mesh(self, context: bpy.types.Context):
@@ -12,31 +23,81 @@ class ObjectLODProps(bpy.types.PropertyGroup):
 
         active_obj_lod = obj.sollumz_lods.active_lod
 
-        if active_obj_lod == self and self.mesh is not None:
-            obj.data = self.mesh
-            if obj.name in context.view_layer.objects:
+        mesh = self.mesh
+
+        # Reassigning obj.data or calling hide_set tags the object for update even when nothing changes, so only
+        # do so when needed. bpy wrappers are compared with != since each access creates a new Python object
+        if active_obj_lod == self and mesh is not None:
+            if obj.data != mesh:
+                obj.data = mesh
+            if obj.name in context.view_layer.objects and obj.hide_get():
                 obj.hide_set(False)
-        elif self.mesh is None:
-            if obj.name in context.view_layer.objects:
+        elif mesh is None:
+            if obj.name in context.view_layer.objects and not obj.hide_get():
                 obj.hide_set(True)
 
     level: bpy.props.EnumProperty(
-        items=items_from_enums(LODLevel))
+        items=LOD_LEVEL_ITEMS)
     mesh: bpy.props.PointerProperty(
         type=bpy.types.Mesh, update=update_mesh)
 
 
+class SceneVisibilityProperties(bpy.types.PropertyGroup):
+    show_collisions: bpy.props.BoolProperty(default=True)
+    show_shattermaps: bpy.props.BoolProperty(default=True)
+
+
+# Maps LODLevels pointers to the index of each LOD level in ``LODLevels.lods``. Stored at module level because the
+# Python wrappers of PropertyGroups are recreated on every access and can't hold attributes of their own. Cleared when
+# a file is loaded and on undo/redo, since pointers of freed objects can be reused.
+_lod_index_cache: dict[int, dict[str, int]] = {}
+
+
 class LODLevels(bpy.types.PropertyGroup):
+    def _get_index(self, lod_level: str) -> int | None:
+        """Get the index of ``lod_level`` in ``self.lods``. Cached indices are verified before use, so the cache is
+        rebuilt whenever the collection changed."""
+        key = self.as_pointer()
+        index_by_level = _lod_index_cache.get(key)
+
+        if index_by_level is not None:
+            i = index_by_level.get(lod_level)
+
+            if i is not None and i < len(self.lods) and self.lods[i].level == lod_level:
+                return i
+
+        index_by_level = {level: i for i,
+                          level in enumerate(self._get_all_levels())}
+        _lod_index_cache[key] = index_by_level
+
+        return index_by_level.get(lod_level)
+
+    def _get_all_levels(self) -> list[str]:
+        """Get the level of every lod in ``self.lods``, read in a single ``foreach_get`` call where possible."""
+        lods = self.lods
+        level_values = np.empty(len(lods), dtype=np.int32)
+
+        try:
+            # Enum properties are read as the index of each item in LOD_LEVEL_ITEMS
+            lods.foreach_get("level", level_values)
+            return [LOD_LEVEL_ITEMS[i][0] for i in level_values.tolist()]
+        except (TypeError, RuntimeError, IndexError):
+            return [lod.level for lod in lods]
+
     def get_lod(self, lod_level: str) -> ObjectLODProps | None:
-        for lod in self.lods:
-            if lod.level == lod_level:
-                return lod
+        i = self._get_index(lod_level)
+
+        if i is not None:
+            return self.lods[i]
 
     def set_lod_mesh(self, lod_level: str, mesh: bpy.types.Mesh) -> ObjectLODProps | None:
-        for lod in self.lods:
-            if lod.level == lod_level:
-                lod.mesh = mesh
-                return lod
+        lod = self.get_lod(lod_level)
+
+        # Skip no-op assignments so the mesh update callback doesn't run for nothing
+        if lod is not None and lod.mesh != mesh:
+            lod.mesh = mesh
+
+        return lod
 
     def add_lod(self, lod_level: str, mesh: Optional[bpy.types.Mesh] = None) -> ObjectLODProps | None:
         # Can't have multiple lods with the same type
@@ -48,99 +109,107 @@ class LODLevels(bpy.types.PropertyGroup):
         obj_lod = self.lods[i]
         obj_lod.level = lod_level
 
+        _lod_index_cache.pop(self.as_pointer(), None)
+
         if mesh is not None:
             obj_lod.mesh = mesh
 
         return obj_lod
 
     def set_highest_lod_active(self):
-        lod_levels = [LODLevel.VERYHIGH, LODLevel.HIGH,
-                      LODLevel.MEDIUM, LODLevel.LOW, LODLevel.VERYLOW]
+        lods = self.lods
 
-        for lod_level in lod_levels:
-            lod = self.get_lod(lod_level)
-            if lod.mesh is not None:
-                self.set_active_lod(lod_level)
-                return
+        for lod_level in LOD_LEVELS:
+            i = self._get_index(lod_level)
 
-    def set_active_lod(self, lod_level: str):
-        for i, lod in enumerate(self.lods):
-            if lod.level == lod_level:
+            if i is not None and lods[i].mesh is not None:
                 self.active_lod_index = i
                 return
 
+    def set_active_lod(self, lod_level: str):
+        i = self._get_index(lod_level)
+
+        if i is not None:
+            self.active_lod_index = i
+
     def update_active_lod(self, context):
         self.active_lod.update_mesh(context)
 
     def add_empty_lods(self):
         """Add all LOD lods with no meshes assigned."""
-        self.add_lod(LODLevel.VERYHIGH)
-        self.add_lod(LODLevel.HIGH)
-        self.add_lod(LODLevel.MEDIUM)
-        self.add_lod(LODLevel.LOW)
-        self.add_lod(LODLevel.VERYLOW)
+        # Check for existing lods once up front instead of once per add_lod call
+        existing_levels = {lod.level for lod in self.lods}
+
+        for lod_level in LOD_LEVELS:
+            if lod_level in existing_levels:
+                continue
+
+            self.lods.add().level = lod_level
+
+        _lod_index_cache.pop(self.as_pointer(), None)
 
     @property
     def active_lod(self) -> ObjectLODProps | None:
-        if self.active_lod_index < len(self.lods):
-            return self.lods[self.active_lod_index]
+        lods = self.lods
+        i = self.active_lod_index
+
+        if i < len(lods):
+            return lods[i]
 
     lods: bpy.props.CollectionProperty(type=ObjectLODProps)
     active_lod_index: bpy.props.IntProperty(
         min=0, update=update_active_lod)
 
 
-class SetLodLevelHelper:
-    """Helper class for setting the LOD level of Sollumz objects."""
-    LOD_LEVEL: LODLevel = LODLevel.HIGH
-    bl_description = "Set the viewing level for the selected Fragment/Drawable"
+# Maps active object pointers to whether the object has a Sollumz parent. Shared by the polls of all LOD buttons drawn
+# in a redraw, and cleared on every depsgraph update since the hierarchy may have changed.
+_has_sollumz_parent_cache: dict[int, bool] = {}
 
-    @classmethod
-    def poll(cls, context):
-        active_obj = context.view_layer.objects.active
-        return active_obj is not None and find_sollumz_parent(active_obj)
 
-    def execute(self, context):
-        active_obj = context.view_layer.objects.active
-        obj = find_sollumz_parent(active_obj)
-        set_all_lods(obj, self.LOD_LEVEL)
+@persistent
+def clear_poll_cache(*_):
+    _has_sollumz_parent_cache.clear()
 
-        return {"FINISHED"}
 
+@persistent
+def clear_lod_index_cache(*_):
+    _lod_index_cache.clear()
 
-class SOLLUMZ_OT_SET_LOD_VERY_HIGH(bpy.types.Operator, SetLodLevelHelper):
-    bl_idname = "sollumz.set_lod_very_high"
-    bl_label = "Very High"
 
-    LOD_LEVEL = LODLevel.VERYHIGH
-
-
-class SOLLUMZ_OT_SET_LOD_HIGH(bpy.types.Operator, SetLodLevelHelper):
-    bl_idname = "sollumz.set_lod_high"
-    bl_label = "High"
+class SetLodLevelHelper:
+    """Helper class for setting the LOD level of Sollumz objects."""
+    bl_description = "Set the viewing level for the selected Fragment/Drawable"
+    bl_options = {"REGISTER", "UNDO"}
 
-    LOD_LEVEL = LODLevel.HIGH
+    @classmethod
+    def poll(cls, context):
+        active_obj = context.view_layer.objects.active
 
+        if active_obj is None:
+            return False
 
-class SOLLUMZ_OT_SET_LOD_MED(bpy.types.Operator, SetLodLevelHelper):
-    bl_idname = "sollumz.set_lod_med"
-    bl_label = "Medium"
+        key = active_obj.as_pointer()
 
-    LOD_LEVEL = LODLevel.MEDIUM
+        if key not in _has_sollumz_parent_cache:
+            _has_sollumz_parent_cache[key] = find_sollumz_parent(
+                active_obj) is not None
 
+        return _has_sollumz_parent_cache[key]
 
-class SOLLUMZ_OT_SET_LOD_LOW(bpy.types.Operator, SetLodLevelHelper):
-    bl_idname = "sollumz.set_lod_low"
-    bl_label = "Low"
 
-    LOD_LEVEL = LODLevel.LOW
+class SOLLUMZ_OT_SET_LOD_LEVEL(bpy.types.Operator, SetLodLevelHelper):
+    bl_idname = "sollumz.set_lod_level"
+    bl_label = "Set LOD Level"
 
+    lod_level: bpy.props.EnumProperty(
+        items=LOD_LEVEL_ITEMS, name="LOD Level")
 
-class SOLLUMZ_OT_SET_LOD_VLOW(bpy.types.Operator, SetLodLevelHelper):
-    bl_idname = "sollumz.set_lod_vlow"
-    bl_label = "Very Low"
+    def execute(self, context):
+        active_obj = context.view_layer.objects.active
+        obj = find_sollumz_parent(active_obj)
+        set_all_lods(obj, self.lod_level)
 
-    LOD_LEVEL = LODLevel.VERYLOW
+        return {"FINISHED"}
 
 
 class SOLLUMZ_OT_HIDE_OBJECT(bpy.types.Operator, SetLodLevelHelper):
@@ -155,14 +224,22 @@ class SOLLUMZ_OT_HIDE_OBJECT(bpy.types.Operator, SetLodLevelHelper):
         do_hide = not obj_hidden
         obj.sollumz_obj_is_hidden = do_hide
 
-        obj.hide_set(do_hide)
+        # Collect every object whose visibility actually changes before touching any of them, so the read-only
+        # pass over the hierarchy isn't interleaved with visibility updates
+        objs_to_update = [obj] if obj.hide_get() != do_hide else []
 
-        for child in obj.children_recursive:
+        for child in get_lod_model_children(obj):
             active_lod = child.sollumz_lods.active_lod
-            if child.sollum_type != SollumType.DRAWABLE_MODEL or not active_lod or active_lod.mesh is None:
+            if not active_lod or active_lod.mesh is None:
                 continue
 
-            child.hide_set(do_hide)
+            if child.hide_get() != do_hide:
+                objs_to_update.append(child)
+
+        # hide_set is kept over hide_viewport: hide_viewport is a global flag that the LOD system (which checks
+        # hide_get) would never clear again
+        for obj_to_update in objs_to_update:
+            obj_to_update.hide_set(do_hide)
 
         return {"FINISHED"}
 
@@ -173,7 +250,7 @@ class SOLLUMZ_OT_HIDE_COLLISIONS(bpy.types.Operator):
     bl_description = "Hide all collisions in the scene"
 
     def execute(self, context):
-        context.scene.sollumz_show_collisions = False
+        context.scene.sollumz_visibility.show_collisions = False
         set_collision_visibility(False)
 
         return {"FINISHED"}
@@ -185,7 +262,7 @@ class SOLLUMZ_OT_SHOW_COLLISIONS(bpy.types.Operator):
     bl_description = "Show all collisions in the scene"
 
     def execute(self, context):
-        context.scene.sollumz_show_collisions = True
+        context.scene.sollumz_visibility.show_collisions = True
         set_collision_visibility(True)
 
         return {"FINISHED"}
@@ -197,7 +274,7 @@ class SOLLUMZ_OT_SHOW_SHATTERMAPS(bpy.types.Operator):
     bl_description = "Show all shattermaps in the scene"
 
     def execute(self, context):
-        context.scene.sollumz_show_shattermaps = True
+        context.scene.sollumz_visibility.show_shattermaps = True
         set_shattermaps_visibility(True)
 
         return {"FINISHED"}
@@ -209,7 +286,7 @@ class SOLLUMZ_OT_HIDE_SHATTERMAPS(bpy.types.Operator):
     bl_description = "Hide all shattermaps in the scene"
 
     def execute(self, context):
-        context.scene.sollumz_show_shattermaps = False
+        context.scene.sollumz_visibility.show_shattermaps = False
         set_shattermaps_visibility(False)
 
         return {"FINISHED"}
@@ -280,7 +357,7 @@ class SOLLUMZ_PT_LOD_LEVEL_PANEL(bpy.types.Panel):
     @classmethod
     def poll(cls, context):
         active_obj = context.view_layer.objects.active
-        return active_obj is not None and active_obj.type == "MESH" and active_obj.sollum_type in [*FRAGMENT_TYPES, *DRAWABLE_TYPES]
+        return active_obj is not None and active_obj.type == "MESH" and active_obj.sollum_type in LOD_PANEL_TYPES
 
     def draw(self, context):
         layout = self.layout
@@ -299,9 +376,7 @@ class SOLLUMZ_PT_LOD_LEVEL_PANEL(bpy.types.Panel):
 def set_collision_visibility(is_visible: bool):
     """Set visibility of all collision objects in the scene"""
     for obj in bpy.context.view_layer.objects:
-        obj_is_collision = obj.sollum_type in BOUND_TYPES or obj.sollum_type in BOUND_POLYGON_TYPES
-
-        if not obj_is_collision:
+        if obj.sollum_type not in COLLISION_TYPES:
             continue
 
         obj.hide_set(not is_visible)
@@ -319,12 +394,17 @@ def set_shattermaps_visibility(is_visible: bool):
 def set_all_lods(obj: bpy.types.Object, lod_level: LODLevel):
     """Set LOD levels of all of children of ``obj``"""
     obj.sollumz_obj_is_hidden = False
-    obj.hide_set(False)
 
-    for child in obj.children_recursive:
-        if child.type == "MESH" and child.sollum_type == SollumType.DRAWABLE_MODEL:
-            child.sollumz_lods.set_active_lod(lod_level)
-            continue
+    if obj.hide_get():
+        obj.hide_set(False)
+
+    for child in get_lod_model_children(obj):
+        child.sollumz_lods.set_active_lod(lod_level)
+
+
+def get_lod_model_children(obj: bpy.types.Object) -> list[bpy.types.Object]:
+    """Get all Drawable Model meshes in the hierarchy of ``obj`` (the objects managed by LODs)."""
+    return [child for child in obj.children_recursive if child.type == "MESH" and child.sollum_type == SollumType.DRAWABLE_MODEL]
 
 
 def operates_on_lod_level(func: Callable):
@@ -349,20 +429,32 @@ def operates_on_lod_level(func: Callable):
 
 
 def register():
+    bpy.app.handlers.depsgraph_update_post.append(clear_poll_cache)
+    bpy.app.handlers.load_post.append(clear_poll_cache)
+    bpy.app.handlers.undo_post.append(clear_poll_cache)
+    bpy.app.handlers.redo_post.append(clear_poll_cache)
+    bpy.app.handlers.load_post.append(clear_lod_index_cache)
+    bpy.app.handlers.undo_post.append(clear_lod_index_cache)
+    bpy.app.handlers.redo_post.append(clear_lod_index_cache)
+
     bpy.types.Object.sollumz_lods = bpy.props.PointerProperty(
         type=LODLevels)
     bpy.types.Object.sollumz_obj_is_hidden = bpy.props.BoolProperty()
-    bpy.types.Scene.sollumz_show_collisions = bpy.props.BoolProperty(
-        default=True)
-    bpy.types.Scene.sollumz_show_shattermaps = bpy.props.BoolProperty(
-        default=True)
-    bpy.types.Scene.sollumz_copy_lod_level = bpy.props.EnumProperty(
-        items=items_from_enums(LODLevel))
+    bpy.types.Scene.sollumz_visibility = bpy.props.PointerProperty(
+        type=SceneVisibilityProperties)
 
 
 def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(clear_poll_cache)
+    bpy.app.handlers.load_post.remove(clear_poll_cache)
+    bpy.app.handlers.undo_post.remove(clear_poll_cache)
+    bpy.app.handlers.redo_post.remove(clear_poll_cache)
+    bpy.app.handlers.load_post.remove(clear_lod_index_cache)
+    bpy.app.handlers.undo_post.remove(clear_lod_index_cache)
+    bpy.app.handlers.redo_post.remove(clear_lod_index_cache)
+    _has_sollumz_parent_cache.clear()
+    _lod_index_cache.clear()
+
     del bpy.types.Object.sollumz_lods
     del bpy.types.Object.sollumz_obj_is_hidden
-    del bpy.types.Scene.sollumz_show_collisions
-    del bpy.types.Scene.sollumz_show_shattermaps
-    del bpy.types.Scene.sollumz_copy_lod_level
+    del bpy.types.Scene.sollumz_visibility
@@ -1,5 +1,6 @@
 import bpy
 from bpy.types import Menu
+from .sollumz_properties import LODLevel
 
 
 def find_missing_files(filepath):
@@ -49,27 +50,32 @@ class SOLLUMZ_MT_view_pie_menu(Menu):
 
         pie = layout.menu_pie()
         # Left
-        if context.scene.sollumz_show_collisions:
+        if context.scene.sollumz_visibility.show_collisions:
             pie.operator("sollumz.hide_collisions")
         else:
             pie.operator("sollumz.show_collisions")
         # Right
-        pie.operator("sollumz.set_lod_med")
+        pie.operator("sollumz.set_lod_level",
+                     text="Medium").lod_level = LODLevel.MEDIUM
         # Bottom
-        pie.operator("sollumz.set_lod_vlow")
+        pie.operator("sollumz.set_lod_level",
+                     text="Very Low").lod_level = LODLevel.VERYLOW
         # Top
-        pie.operator("sollumz.set_lod_very_high")
+        pie.operator("sollumz.set_lod_level",
+                     text="Very High").lod_level = LODLevel.VERYHIGH
         # Top-left
-        if context.scene.sollumz_show_shattermaps:
+        if context.scene.sollumz_visibility.show_shattermaps:
             pie.operator("sollumz.hide_shattermaps")
         else:
             pie.operator("sollumz.show_shattermaps")
         # Top-right
-        pie.operator("sollumz.set_lod_high")
+        pie.operator("sollumz.set_lod_level",
+                     text="High").lod_level = LODLevel.HIGH
         # Bottom-left
         pie.operator("sollumz.hide_object", text="Hide")
         # Bottom-right
-        pie.operator("sollumz.set_lod_low")
+        pie.operator("sollumz.set_lod_level",
+                     text="Low").lod_level = LODLevel.LOW
 
 
 addon_keymaps = []
@@ -2,9 +2,18 @@ import bpy
 from .sollumz_preferences import get_addon_preferences, get_export_settings, get_import_settings, SollumzImportSettings, SollumzExportSettings
 from .sollumz_operators import SOLLUMZ_OT_copy_all_locations, SOLLUMZ_OT_copy_location, SOLLUMZ_OT_copy_rotation, SOLLUMZ_OT_paste_location
 from .tools.blenderhelper import get_armature_obj
-from .sollumz_properties import SollumType, MaterialType
-from .lods import (SOLLUMZ_OT_SET_LOD_HIGH, SOLLUMZ_OT_SET_LOD_MED, SOLLUMZ_OT_SET_LOD_LOW, SOLLUMZ_OT_SET_LOD_VLOW,
-                   SOLLUMZ_OT_SET_LOD_VERY_HIGH, SOLLUMZ_OT_HIDE_COLLISIONS, SOLLUMZ_OT_HIDE_SHATTERMAPS, SOLLUMZ_OT_HIDE_OBJECT, SOLLUMZ_OT_SHOW_COLLISIONS, SOLLUMZ_OT_SHOW_SHATTERMAPS)
+from .sollumz_properties import SollumType, MaterialType, LODLevel
+from .lods import (SOLLUMZ_OT_SET_LOD_LEVEL, SOLLUMZ_OT_HIDE_COLLISIONS, SOLLUMZ_OT_HIDE_SHATTERMAPS, SOLLUMZ_OT_HIDE_OBJECT, SOLLUMZ_OT_SHOW_COLLISIONS, SOLLUMZ_OT_SHOW_SHATTERMAPS)
+
+SET_LOD_LEVEL_IDNAME = SOLLUMZ_OT_SET_LOD_LEVEL.bl_idname
+# (LOD level, button text) for each button in the Level of Detail grid
+LOD_LEVEL_BUTTONS = (
+    (LODLevel.VERYHIGH.value, "Very High"),
+    (LODLevel.HIGH.value, "High"),
+    (LODLevel.MEDIUM.value, "Medium"),
+    (LODLevel.LOW.value, "Low"),
+    (LODLevel.VERYLOW.value, "Very Low"),
+)
 
 
 def draw_list_with_add_remove(layout: bpy.types.UILayout, add_operator: str, remove_operator: str, *temp_list_args, **temp_list_kwargs):
@@ -287,12 +296,12 @@ class SOLLUMZ_PT_VIEW_PANEL(bpy.types.Panel):
 
         grid = layout.grid_flow(align=True, row_major=True)
         grid.scale_x = 0.7
-        if context.scene.sollumz_show_collisions:
+        if context.scene.sollumz_visibility.show_collisions:
             grid.operator(SOLLUMZ_OT_HIDE_COLLISIONS.bl_idname)
         else:
             grid.operator(SOLLUMZ_OT_SHOW_COLLISIONS.bl_idname)
 
-        if context.scene.sollumz_show_shattermaps:
+        if context.scene.sollumz_visibility.show_shattermaps:
             grid.operator(SOLLUMZ_OT_HIDE_SHATTERMAPS.bl_idname)
         else:
             grid.operator(SOLLUMZ_OT_SHOW_SHATTERMAPS.bl_idname)
@@ -303,11 +312,9 @@ class SOLLUMZ_PT_VIEW_PANEL(bpy.types.Panel):
 
         grid = layout.grid_flow(align=True, row_major=True)
         grid.scale_x = 0.7
-        grid.operator(SOLLUMZ_OT_SET_LOD_VERY_HIGH.bl_idname)
-        grid.operator(SOLLUMZ_OT_SET_LOD_HIGH.bl_idname)
-        grid.operator(SOLLUMZ_OT_SET_LOD_MED.bl_idname)
-        grid.operator(SOLLUMZ_OT_SET_LOD_LOW.bl_idname)
-        grid.operator(SOLLUMZ_OT_SET_LOD_VLOW.bl_idname)
+        for lod_level, text in LOD_LEVEL_BUTTONS:
+            grid.operator(SET_LOD_LEVEL_IDNAME,
+                          text=text).lod_level = lod_level
         grid.operator(SOLLUMZ_OT_HIDE_OBJECT.bl_idname)
 
         grid.enabled = context.view_layer.objects.active is not None and context.view_layer.objects.active.mode == "OBJECT"
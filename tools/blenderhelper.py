@@ -8,6 +8,8 @@ from ..sollumz_properties import SOLLUMZ_UI_NAMES, LODLevel
 
 from ..sollumz_properties import SOLLUMZ_UI_NAMES, SollumType
 
+NUMBER_SUFFIX_PATTERN = re.compile(r"\.[0-9]")
+
 
 def get_all_collections():
     return [bpy.context.scene.collection, *bpy.data.collections]
@@ -15,7 +17,7 @@ def get_all_collections():
 
 def remove_number_suffix(string: str):
     """Remove the .00# at that Blender puts at the end of object names."""
-    match = re.search("\.[0-9]", string)
+    match = NUMBER_SUFFIX_PATTERN.search(string)
 
     if match is None:
         return string
@@ -257,18 +259,20 @@ def get_armature_obj(armature):
 
 
 def get_children_recursive(obj) -> list[bpy.types.Object]:
+    """Get all descendants of ``obj`` in depth-first pre-order. Walks the hierarchy with an explicit stack rather than
+    recursion."""
     children = []
 
     if obj is None:
         return children
 
-    if len(obj.children) < 1:
-        return children
+    # Children are pushed in reverse so they are popped in their original order
+    stack = list(reversed(obj.children))
 
-    for child in obj.children:
+    while stack:
+        child = stack.pop()
         children.append(child)
-        if len(child.children) > 0:
-            children.extend(get_children_recursive(child))
+        stack.extend(reversed(child.children))
 
     return children
 
@@ -304,10 +308,7 @@ def create_empty_object(sollum_type: SollumType, name: Optional[str] = None) ->
 
 
 def delete_hierarchy(obj: bpy.types.Object):
-    for child in obj.children:
-        delete_hierarchy(child)
-
-    bpy.data.objects.remove(obj)
+    bpy.data.batch_remove([obj, *get_children_recursive(obj)])
 
 
 def add_armature_modifier(obj: bpy.types.Object, armature_obj: bpy.types.Object):
@@ -1,3 +1,4 @@
+import numpy as np
 from itertools import groupby
 
 
@@ -21,25 +22,27 @@ def remove_ff(row):
     return row
 
 
+def get_shattermap_value(value: int) -> str:
+    if value == 0:
+        return "##"
+    elif value <= 15:
+        return "0{0:X}".format(value)
+
+    return "{0:X}".format(value)
+
+
 def image_to_shattermap(img):
     width = img.size[0]
-    values = []
-    row = []
-    for idx in range(int(len(img.pixels) / 4) + 1):
-        if idx % width == 0:
-            row = remove_ff(row)
-            values.append(row)
-            row = []
-        try:
-            value = int(img.pixels[idx * 4] * 255)
-            if value == 0:
-                value = "##"
-            elif value <= 15:
-                value = "0{0:X}".format(value)
-            else:
-                value = "{0:X}".format(value)
-            row.append(value)
-        except:
-            continue
+
+    # Read all pixels at once, indexing img.pixels per pixel copies the whole buffer every time
+    pixels = np.empty(len(img.pixels), dtype=np.float32)
+    img.pixels.foreach_get(pixels)
+    # Only the red channel is used. Scaled in float64 and truncated, matching int(value * 255)
+    red_values = (pixels[::4].astype(np.float64) * 255).astype(np.int64).tolist()
+
+    values = [[]]
+    for start in range(0, len(red_values), width):
+        row = [get_shattermap_value(value) for value in red_values[start:start + width]]
+        values.append(remove_ff(row))
 
     return reversed(values)
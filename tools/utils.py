@@ -172,6 +172,19 @@ def multiply_homogeneous(m: Matrix, v: Vector):
     return Vector((x * iw, y * iw, z * iw))
 
 
+def multiply_homogeneous_batch(m: Matrix | NDArray, verts: NDArray) -> NDArray:
+    """Vectorized version of ``multiply_homogeneous`` for a (N, 3) array of vertices. Returns a (N, 3) array."""
+    verts = numpy.asarray(verts, dtype=numpy.float64)
+    homogeneous = numpy.empty((len(verts), 4), dtype=numpy.float64)
+    homogeneous[:, :3] = verts
+    homogeneous[:, 3] = 1
+
+    # Row vectors times the matrix, matching the m[row][col] indexing in multiply_homogeneous
+    result = homogeneous @ numpy.array(m, dtype=numpy.float64)
+
+    return result[:, :3] / numpy.abs(result[:, 3:])
+
+
 def list_index_exists(ls, i):
     return (0 <= i < len(ls)) or (-len(ls) <= i < 0)
 
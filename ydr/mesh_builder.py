@@ -3,14 +3,29 @@ import numpy as np
 from numpy.typing import NDArray
 from traceback import format_exc
 from ..tools.meshhelper import create_uv_attr, create_color_attr, flip_uvs
-from mathutils import Vector
 from .. import logger
 
 
+# Maps vertex array dtypes to their (TexCoord field names, Colour field names)
+_FIELD_CLASSIFY: dict[np.dtype, tuple[list[str], list[str]]] = {}
+
+
+def get_uv_color_fields(dtype: np.dtype) -> tuple[list[str], list[str]]:
+    """Get the TexCoord and Colour field names of a vertex array dtype. Field names are only classified once per dtype."""
+    fields = _FIELD_CLASSIFY.get(dtype)
+
+    if fields is None:
+        uv_fields = [name for name in dtype.names if "TexCoord" in name]
+        color_fields = [name for name in dtype.names if "Colour" in name]
+        fields = _FIELD_CLASSIFY[dtype] = (uv_fields, color_fields)
+
+    return fields
+
+
 class MeshBuilder:
     """Builds a bpy mesh from a structured numpy vertex array"""
 
-    def __init__(self, name: str, vertex_arr: NDArray, ind_arr: NDArray[np.uint], mat_inds: NDArray[np.uint], drawable_mats: list[bpy.types.Material]):
+    def __init__(self, name: str, vertex_arr: NDArray, ind_arr: NDArray[np.uint32], mat_inds: NDArray[np.uint32], drawable_mats: list[bpy.types.Material]):
         if "Position" not in vertex_arr.dtype.names:
             raise ValueError("Vertex array have a 'Position' field!")
 
@@ -25,19 +40,19 @@ class MeshBuilder:
         self.name = name
         self.materials = drawable_mats
 
+        self._uv_fields, self._color_fields = get_uv_color_fields(
+            vertex_arr.dtype)
+
         self._has_normals = "Normal" in vertex_arr.dtype.names
-        self._has_uvs = any(
-            "TexCoord" in name for name in vertex_arr.dtype.names)
-        self._has_colors = any(
-            "Colour" in name for name in vertex_arr.dtype.names)
+        self._has_uvs = len(self._uv_fields) > 0
+        self._has_colors = len(self._color_fields) > 0
+        self._has_weights = "BlendWeights" in vertex_arr.dtype.names and "BlendIndices" in vertex_arr.dtype.names
 
     def build(self):
         mesh = bpy.data.meshes.new(self.name)
-        vert_pos = self.vertex_arr["Position"]
-        faces = self.ind_arr.reshape((int(self.ind_arr.size / 3), 3))
 
         try:
-            mesh.from_pydata(vert_pos, [], faces)
+            self.create_mesh_geometry(mesh)
         except Exception:
             logger.error(
                 f"Error during creation of fragment {self.name}:\n{format_exc()}\nEnsure the mesh data is not malformed.")
@@ -58,35 +73,71 @@ class MeshBuilder:
 
         return mesh
 
+    def create_mesh_geometry(self, mesh: bpy.types.Mesh):
+        """Set the vertices, loops and polygons of ``mesh`` directly from the vertex and index arrays.
+        Falls back to ``from_pydata`` if the mesh buffers cannot be set directly."""
+        vert_pos = self.vertex_arr["Position"]
+        num_verts = len(vert_pos)
+        num_loops = self.ind_arr.size
+        num_faces = num_loops // 3
+
+        if num_loops % 3 != 0:
+            raise ValueError(
+                "Index array length is not a multiple of 3, it cannot be split into triangles!")
+
+        if num_loops > 0 and np.max(self.ind_arr) >= num_verts:
+            raise ValueError(
+                "Index array references vertices outside of the vertex array!")
+
+        try:
+            mesh.vertices.add(num_verts)
+            mesh.loops.add(num_loops)
+            mesh.polygons.add(num_faces)
+
+            mesh.vertices.foreach_set(
+                "co", np.ascontiguousarray(vert_pos, dtype=np.float32).ravel())
+            mesh.loops.foreach_set(
+                "vertex_index", self.ind_arr.astype(np.int32))
+            mesh.polygons.foreach_set("loop_start", np.arange(
+                0, num_loops, 3, dtype=np.int32))
+            mesh.polygons.foreach_set(
+                "loop_total", np.full(num_faces, 3, dtype=np.int32))
+
+            mesh.update(calc_edges=True)
+        except (AttributeError, RuntimeError, TypeError):
+            mesh.clear_geometry()
+            faces = self.ind_arr.reshape((num_faces, 3))
+            mesh.from_pydata(vert_pos, [], faces)
+
     def create_mesh_materials(self, mesh: bpy.types.Mesh):
+        if self.mat_inds.size == 0:
+            return
+
         drawable_mat_inds = np.unique(self.mat_inds)
-        # Map drawable material indices to model material indices
-        model_mat_inds = np.zeros(
-            np.max(drawable_mat_inds) + 1, dtype=np.uint32)
+        # Direct lookup table mapping drawable material indices to model material indices
+        model_mat_inds = np.full(
+            np.max(drawable_mat_inds) + 1, -1, dtype=np.int32)
 
-        for mat_ind in drawable_mat_inds:
+        for i, mat_ind in enumerate(drawable_mat_inds):
             mesh.materials.append(self.materials[mat_ind])
-            model_mat_inds[mat_ind] = len(mesh.materials) - 1
+            model_mat_inds[mat_ind] = i
 
-        # Set material indices via attributes
-        mesh.attributes.new("material_index", type="INT", domain="FACE")
-        mesh.attributes["material_index"].data.foreach_set(
-            "value", model_mat_inds[self.mat_inds])
+        mesh.polygons.foreach_set(
+            "material_index", model_mat_inds[self.mat_inds])
 
     def set_mesh_normals(self, mesh: bpy.types.Mesh):
         mesh.polygons.foreach_set("use_smooth", [True] * len(mesh.polygons))
 
-        normals_normalized = [Vector(n).normalized()
-                              for n in self.vertex_arr["Normal"]]
+        normals = self.vertex_arr["Normal"]
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals_normalized = np.divide(normals, lengths, out=np.zeros_like(
+            normals), where=lengths != 0)
         mesh.normals_split_custom_set_from_vertices(normals_normalized)
 
         mesh.use_auto_smooth = True
 
     def set_mesh_uvs(self, mesh: bpy.types.Mesh):
-        uv_attrs = [
-            name for name in self.vertex_arr.dtype.names if "TexCoord" in name]
-
-        for attr_name in uv_attrs:
+        for attr_name in self._uv_fields:
             uvs = self.vertex_arr[attr_name]
 
             flip_uvs(uvs)
@@ -94,15 +145,15 @@ class MeshBuilder:
             create_uv_attr(mesh, uvs[self.ind_arr])
 
     def set_mesh_vertex_colors(self, mesh: bpy.types.Mesh):
-        color_attrs = [
-            name for name in self.vertex_arr.dtype.names if "Colour" in name]
-
-        for attr_name in color_attrs:
+        for attr_name in self._color_fields:
             colors = self.vertex_arr[attr_name] / 255
 
             create_color_attr(mesh, colors[self.ind_arr])
 
     def create_vertex_groups(self, obj: bpy.types.Object, bones: list[bpy.types.Bone]):
+        if not self._has_weights:
+            return
+
         weights = self.vertex_arr["BlendWeights"] / 255
         indices = self.vertex_arr["BlendIndices"]
 
@@ -116,10 +167,9 @@ class MeshBuilder:
 
             return obj.vertex_groups.new(name=bone_name)
 
-        for vert_ind, bone_inds in enumerate(indices):
-            for i, bone_ind in enumerate(bone_inds):
-                weight = weights[vert_ind][i]
-
+        # Iterate plain Python lists so vertex_groups is keyed by ints rather than NumPy scalars, which hash slower
+        for vert_ind, (bone_inds, vert_weights) in enumerate(zip(indices.tolist(), weights.tolist())):
+            for bone_ind, weight in zip(bone_inds, vert_weights):
                 if weight == 0 and bone_ind == 0:
                     continue
 
@@ -9,10 +9,14 @@ from ..sollumz_properties import LODLevel
 from ..cwxml.drawable import Bone, Drawable, DrawableModel, Geometry, VertexBuffer
 
 
+# Max number of faces processed at once when finding overlapping vertex groups
+GROUP_RELATIONS_CHUNK_SIZE = 16384
+
+
 class MeshData(NamedTuple):
     vert_arr: NDArray
-    ind_arr: NDArray[np.uint]
-    mat_inds: NDArray[np.uint]
+    ind_arr: NDArray[np.uint32]
+    mat_inds: NDArray[np.uint32]
 
 
 class ModelData(NamedTuple):
@@ -45,14 +49,17 @@ def get_model_data(drawable_xml: Drawable) -> list[ModelData]:
 
 def get_model_data_split_by_group(drawable_xml: Drawable) -> list[ModelData]:
     model_datas = get_model_data(drawable_xml)
+    bones = drawable_xml.skeleton.bones
 
-    return [split_data for model_data in model_datas for split_data in split_model_by_group(model_data, drawable_xml.skeleton.bones)]
+    return [split_data for model_data in model_datas for split_data in split_model_by_group(model_data, bones)]
 
 
 def split_model_by_group(model_data: ModelData, bones: list[Bone]) -> list[ModelData]:
     """Split ModelData by vertex group"""
     model_datas: list[ModelData] = []
     mesh_data_by_bone: dict[int, dict[LODLevel, MeshData]] = defaultdict(dict)
+    # With a single bone every face belongs to the root group, so there is nothing to split
+    is_single_bone = len(bones) <= 1
 
     for lod_level, mesh_data in model_data.mesh_data_lods.items():
         is_skinned = "BlendWeights" in mesh_data.vert_arr.dtype.names
@@ -61,6 +68,10 @@ def split_model_by_group(model_data: ModelData, bones: list[Bone]) -> list[Model
             mesh_data_by_bone[model_data.bone_index][lod_level] = mesh_data
             continue
 
+        if is_single_bone:
+            mesh_data_by_bone[0][lod_level] = mesh_data
+            continue
+
         for i, face_inds in get_group_face_inds(mesh_data, bones).items():
             vert_arr, ind_arr = get_faces_subset(
                 mesh_data.vert_arr, mesh_data.ind_arr, face_inds)
@@ -86,7 +97,7 @@ def split_model_by_group(model_data: ModelData, bones: list[Bone]) -> list[Model
 def get_group_face_inds(mesh_data: MeshData, bones: list[Bone]):
     """Get face indices split by vertex group. Overlapping vertex groups are merged
     based on bone parenting."""
-    group_inds: dict[int, set] = defaultdict(list)
+    group_inds: dict[int, NDArray[np.uint32]] = {}
 
     blend_inds = mesh_data.vert_arr["BlendIndices"]
     weights = mesh_data.vert_arr["BlendWeights"]
@@ -106,33 +117,61 @@ def get_group_face_inds(mesh_data: MeshData, bones: list[Bone]):
     # Maps group indices to the group index of the object they should be parented to
     parent_map = get_group_parent_map(face_blend_inds, bones)
 
-    for i, all_blend_inds in enumerate(face_blend_inds):
-        # Valid BlendIndices are those where either the index or weight is not 0
-        valid_blend_inds = all_blend_inds[blend_inds_mask[i]]
+    # Each face is grouped by the first valid BlendIndex (where either the index or weight is not 0)
+    has_valid_blend_ind = np.any(blend_inds_mask, axis=1)
+    first_valid = np.argmax(blend_inds_mask, axis=1)
+    first_blend_inds = face_blend_inds[np.arange(num_tris), first_valid]
 
-        if valid_blend_inds.size == 0:
-            group_ind = 0
-        else:
-            group_ind = parent_map[valid_blend_inds[0]]
+    # Only look up the parent group once per unique BlendIndex
+    unique_blend_inds, inverse = np.unique(
+        first_blend_inds[has_valid_blend_ind], return_inverse=True)
+    unique_parents = np.array([parent_map[i]
+                              for i in unique_blend_inds], dtype=np.int64)
 
-        group_inds[group_ind].append(i)
+    face_groups = np.zeros(num_tris, dtype=np.int64)
+    face_groups[has_valid_blend_ind] = unique_parents[inverse.ravel()]
 
-    return {i: np.array(face_inds, dtype=np.uint32) for i, face_inds in group_inds.items()}
+    # Split faces by group, keeping groups in order of first occurence
+    sorted_faces = np.argsort(face_groups, kind="stable")
+    groups, first_faces, counts = np.unique(
+        face_groups, return_index=True, return_counts=True)
+    faces_by_group = np.split(sorted_faces, np.cumsum(counts)[:-1])
+
+    for i in np.argsort(first_faces):
+        group_inds[int(groups[i])] = faces_by_group[i].astype(np.uint32)
+
+    return group_inds
 
 
 def get_group_parent_map(face_blend_inds: NDArray[np.uint32], bones: list[Bone]) -> dict[int, set]:
     """Get a mapping of each blend index to the blend index of the object they should be parented to."""
     # Mapping of each blend index to blend indices with overlapping faces
-    group_relations: dict[int, set[int]] = defaultdict(set)
+    group_relations: dict[int, list[int]] = {}
     parent_map: dict[int, int] = {}
-    group_inds = np.unique(face_blend_inds)
-
-    for group_ind in group_inds:
-        occurences = np.any(face_blend_inds == group_ind, axis=1)
-        related_groups = np.unique(face_blend_inds[occurences].flatten())
+    group_inds, face_group_inds = np.unique(
+        face_blend_inds, return_inverse=True)
+    face_group_inds = face_group_inds.reshape(face_blend_inds.shape)
+
+    # Count how often each pair of groups shares a face. Faces are processed in chunks to bound the size of the
+    # face/group membership matrix
+    num_groups = len(group_inds)
+    num_faces = len(face_group_inds)
+    co_occurences = np.zeros((num_groups, num_groups), dtype=np.float32)
+
+    for start in range(0, num_faces, GROUP_RELATIONS_CHUNK_SIZE):
+        chunk = face_group_inds[start:start + GROUP_RELATIONS_CHUNK_SIZE]
+        membership = np.zeros((len(chunk), num_groups), dtype=np.float32)
+        membership[np.arange(len(chunk))[:, None], chunk] = 1
+        co_occurences += membership.T @ membership
+
+    for i, group_ind in enumerate(group_inds.tolist()):
+        related_groups = group_inds[co_occurences[i] > 0].tolist()
         # Ignore 0 group because all vertex groups are a part of group 0
         group_relations[group_ind] = [
-            i for i in related_groups if i != 0 and i != group_ind]
+            j for j in related_groups if j != 0 and j != group_ind]
+
+    # Many groups overlap the same set of groups, so only find the common parent once per combination
+    common_parents: dict[tuple[int, ...], int] = {}
 
     for blend_ind, blend_inds in group_relations.items():
         # blend_ind does not overlap with any other vertex groups, so it can be created as its own object
@@ -142,7 +181,12 @@ def get_group_parent_map(face_blend_inds: NDArray[np.uint32], bones: list[Bone])
 
         # Find a parent bone that is shared between all blend_inds. All faces with blend_inds vertex groups will be
         # created as a single object
-        parent_map[blend_ind] = find_common_bone_parent(blend_inds, bones)
+        key = tuple(sorted(set(blend_inds)))
+
+        if key not in common_parents:
+            common_parents[key] = find_common_bone_parent(blend_inds, bones)
+
+        parent_map[blend_ind] = common_parents[key]
 
     return parent_map
 
@@ -185,23 +229,15 @@ def get_faces_subset(vert_arr: NDArray, ind_arr: NDArray[np.uint32], face_inds:
 
     subset_inds = faces[face_inds].flatten()
 
-    # Map old vert inds to new vert inds
-    # TODO: Remap inds using numpy?
-    vert_inds_map: dict[int, int] = {}
-    vert_inds = []
-    new_inds = []
-
-    for vert_ind in subset_inds:
-        if vert_ind in vert_inds_map:
-            new_inds.append(vert_inds_map[vert_ind])
-        else:
-            new_vert_ind = len(vert_inds_map)
-            new_inds.append(new_vert_ind)
-            vert_inds_map[vert_ind] = new_vert_ind
-            vert_inds.append(vert_ind)
+    # Map old vert inds to new vert inds, numbering vertices by first occurence
+    unique_vert_inds, first_occurences = np.unique(subset_inds, return_index=True)
+    vert_inds = unique_vert_inds[np.argsort(first_occurences)]
+
+    vert_inds_map = np.full(len(vert_arr), -1, dtype=np.int32)
+    vert_inds_map[vert_inds] = np.arange(len(vert_inds), dtype=np.int32)
 
     new_vert_arr = vert_arr[vert_inds]
-    new_ind_arr = np.array(new_inds, dtype=np.uint32)
+    new_ind_arr = vert_inds_map[subset_inds].astype(np.uint32)
 
     return new_vert_arr, new_ind_arr
 
@@ -225,51 +261,47 @@ def get_lod_model_xmls(drawable_xml: Drawable) -> Tuple[list[dict[LODLevel, Draw
 def mesh_data_from_xml(model_xml: DrawableModel) -> MeshData:
     geoms = get_valid_geoms(model_xml)
 
+    vert_arr, ind_arr, mat_inds = get_model_joined_arrs(geoms)
+
     return MeshData(
-        ind_arr=get_model_joined_ind_arr(geoms),
-        vert_arr=get_model_joined_vert_arr(geoms),
-        mat_inds=get_model_poly_mat_inds(geoms)
+        ind_arr=ind_arr,
+        vert_arr=vert_arr,
+        mat_inds=mat_inds
     )
 
 
-def get_model_joined_ind_arr(geoms: list[Geometry]) -> NDArray[np.uint32]:
-    """Get joined indices array for the model."""
+def get_model_joined_arrs(geoms: list[Geometry]) -> Tuple[NDArray, NDArray[np.uint32], NDArray[np.uint32]]:
+    """Get the joined vertex array, index array and per-face material indices for the model in a single pass over
+    its geometries."""
+    arr_dtype = get_model_vert_buffer_dtype(geoms)
+    # Vertices are copied straight into one preallocated buffer rather than into per-geometry arrays that are
+    # concatenated afterwards
+    joined_vert_arr = np.zeros(
+        sum(len(geom.vertex_buffer.data) for geom in geoms), dtype=arr_dtype)
     ind_arrs: list[NDArray[np.uint32]] = []
+    mat_ind_arrs: list[NDArray[np.uint32]] = []
     num_verts = 0
 
-    for geom in geoms:
-        ind_arr = geom.index_buffer.data
-
-        if num_verts > 0:
-            ind_arr += num_verts
-
-        ind_arrs.append(ind_arr)
-        num_verts += len(geom.vertex_buffer.data)
-
-    return np.concatenate(ind_arrs)
-
-
-def get_model_joined_vert_arr(geoms: list[Geometry]) -> NDArray:
-    arr_dtype = get_model_vert_buffer_dtype(geoms)
-    vert_arrs: list[NDArray] = []
-
     for geom in geoms:
         vert_arr = geom.vertex_buffer.data
-
-        if vert_arr is None:
-            continue
+        ind_arr = geom.index_buffer.data
 
         if geom.bone_ids:
             apply_bone_ids(vert_arr, np.array(geom.bone_ids))
 
-        geom_vert_arr = np.zeros(len(vert_arr), dtype=arr_dtype)
+        geom_vert_arr = joined_vert_arr[num_verts:num_verts + len(vert_arr)]
 
         for name in vert_arr.dtype.names:
             geom_vert_arr[name] = vert_arr[name]
 
-        vert_arrs.append(geom_vert_arr)
+        # Offset into a new array so the geometry's own index buffer is left untouched
+        ind_arrs.append(np.add(ind_arr, num_verts, dtype=np.uint32))
+        mat_ind_arrs.append(
+            np.full(len(ind_arr) // 3, geom.shader_index, dtype=np.uint32))
+
+        num_verts += len(vert_arr)
 
-    return np.concatenate(vert_arrs)
+    return joined_vert_arr, np.concatenate(ind_arrs), np.concatenate(mat_ind_arrs)
 
 
 def get_model_vert_buffer_dtype(geoms: list[Geometry]) -> np.dtype:
@@ -294,18 +326,6 @@ def apply_bone_ids(vert_arr: NDArray, bone_ids: NDArray[np.uint32]):
     vert_arr["BlendIndices"] = bone_ids[vert_arr["BlendIndices"]]
 
 
-def get_model_poly_mat_inds(geoms: list[Geometry]):
-    mat_ind_arrs = []
-
-    for geom in geoms:
-        num_tris = round(len(geom.index_buffer.data) / 3)
-        mat_inds = np.full((num_tris,), geom.shader_index)
-
-        mat_ind_arrs.append(mat_inds)
-
-    return np.concatenate(mat_ind_arrs)
-
-
 def get_valid_geoms(model_xml: DrawableModel) -> list[Geometry]:
     """Get geometries with mesh data in model_xml."""
     return [geom for geom in model_xml.geometries if geom.vertex_buffer.data is not None and geom.index_buffer.data is not None]
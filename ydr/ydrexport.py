@@ -464,14 +464,10 @@ def get_joined_vert_arr_dtype(vert_arrs: list[NDArray]):
 
 def join_ind_arrs(ind_arrs: list[NDArray[np.uint32]], vert_counts: list[int]) -> NDArray[np.uint32]:
     """Join vertex index arrays by simply concatenating and offsetting indices based on vertex counts"""
-    def get_vert_ind_offset(arr_ind: int) -> int:
-        if arr_ind == 0:
-            return 0
-
-        return sum(num_verts for num_verts in vert_counts[:arr_ind])
+    vert_offsets = np.cumsum([0, *vert_counts[:-1]], dtype=np.uint32)
 
     offset_ind_arrs = [
-        ind_arr + get_vert_ind_offset(i) for i, ind_arr in enumerate(ind_arrs)]
+        np.add(ind_arr, offset, dtype=np.uint32) for ind_arr, offset in zip(ind_arrs, vert_offsets)]
 
     return np.concatenate(offset_ind_arrs)
 
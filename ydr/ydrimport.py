@@ -35,8 +35,10 @@ def import_ydr(filepath: str):
 def create_drawable_obj(drawable_xml: Drawable, filepath: str, name: Optional[str] = None, split_by_group: bool = False, external_armature: Optional[bpy.types.Object] = None, external_bones: Optional[list[Bone]] = None, materials: Optional[list[bpy.types.Material]] = None):
     """Create a drawable object. ``split_by_group`` will split each Drawable Model by vertex group. ``external_armature`` allows for bones to be rigged to an armature object that is not the parent drawable."""
     name = name or drawable_xml.name
-    materials = materials or shadergroup_to_materials(
-        drawable_xml.shader_group, filepath)
+    # Only build materials when none were passed in. An empty list from the caller is a valid, already built result
+    if materials is None:
+        materials = shadergroup_to_materials(
+            drawable_xml.shader_group, filepath)
 
     has_skeleton = len(
         drawable_xml.skeleton.bones) > 0
@@ -137,9 +139,7 @@ def create_lod_meshes(model_data: ModelData, model_obj: bpy.types.Object, materi
         set_drawable_model_properties(
             lod_mesh.drawable_model_properties, model_data.xml_lods[lod_level])
 
-        is_skinned = "BlendWeights" in mesh_data.vert_arr.dtype.names
-
-        if is_skinned and bones is not None:
+        if bones is not None:
             mesh_builder.create_vertex_groups(model_obj, bones)
 
     lod_levels.set_highest_lod_active()
@@ -281,15 +281,15 @@ def shader_item_to_material(shader: Shader, shader_group: ShaderGroup, filepath:
                                     format = TextureFormat[texture.format.replace(
                                         "D3DFMT_", "")]
                                     n.texture_properties.format = format
-                                except AttributeError:
-                                    print(
+                                except (KeyError, AttributeError):
+                                    logger.warning(
                                         f"Failed to set texture format: format '{texture.format}' unknown.")
 
                                 try:
                                     usage = TextureUsage[texture.usage]
                                     n.texture_properties.usage = usage
-                                except AttributeError:
-                                    print(
+                                except (KeyError, AttributeError):
+                                    logger.warning(
                                         f"Failed to set texture usage: usage '{texture.usage}' unknown.")
 
                                 n.texture_properties.extra_flags = texture.extra_flags
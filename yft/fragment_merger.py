@@ -91,6 +91,13 @@ class FragShaderMerger:
         self.shaders = shaders
         self.hi_shaders = hi_shaders
 
+        # Shader equality compares hashes, and hashing a Shader serializes its parameters, so compute every hash once
+        # up front. The sets let membership checks run without walking the other shader list.
+        self._shader_hashes: list[int] = [hash(shader) for shader in shaders]
+        self._hi_shader_hashes: list[int] = [hash(shader) for shader in hi_shaders]
+        self._shader_hash_set: set[int] = set(self._shader_hashes)
+        self._hi_shader_hash_set: set[int] = set(self._hi_shader_hashes)
+
         self.new_shader_inds: dict[int, int] = {}
         self.new_hi_shader_inds: dict[int, int] = {}
         self.merged_shaders: list[Shader] = []
@@ -108,17 +115,20 @@ class FragShaderMerger:
                 self._add_shader()
                 continue
 
-            if self.current_shader == self.current_hi_shader:
+            shader_hash = self._shader_hashes[self._shader_ind]
+            hi_shader_hash = self._hi_shader_hashes[self._hi_shader_ind]
+
+            if shader_hash == hi_shader_hash:
                 # Doesn't matter if we add the hi shader or non hi if they are both the same
                 self._add_hi_shader()
                 self._update_shader_ind()
                 continue
 
-            if self.current_shader not in self.hi_shaders:
+            if shader_hash not in self._hi_shader_hash_set:
                 self._add_shader()
                 continue
 
-            if self.current_hi_shader not in self.shaders:
+            if hi_shader_hash not in self._shader_hash_set:
                 self._add_hi_shader()
                 continue
 
@@ -4,6 +4,10 @@ import bmesh
 from ..tools.blenderhelper import remove_number_suffix
 from ..sollumz_properties import SOLLUMZ_UI_NAMES, SollumType, VehicleLightID, VehiclePaintLayer, items_from_enums
 
+# Default physics LOD damping values
+DAMPING_DEFAULT = (0.02, 0.02, 0.02)
+DAMPING_V2_DEFAULT = (0.01, 0.01, 0.01)
+
 
 class FragArchetypeProperties(bpy.types.PropertyGroup):
     unknown_48: bpy.props.FloatProperty(name="Unknown48", default=1)
@@ -24,17 +28,17 @@ class LODProperties(bpy.types.PropertyGroup):
     unknown_40: bpy.props.FloatVectorProperty(name="Unknown40")
     unknown_50: bpy.props.FloatVectorProperty(name="Unknown50")
     damping_linear_c: bpy.props.FloatVectorProperty(
-        name="Damping Linear C", default=(0.02, 0.02, 0.02))
+        name="Damping Linear C", default=DAMPING_DEFAULT)
     damping_linear_v: bpy.props.FloatVectorProperty(
-        name="Damping Linear V", default=(0.02, 0.02, 0.02))
+        name="Damping Linear V", default=DAMPING_DEFAULT)
     damping_linear_v2: bpy.props.FloatVectorProperty(
-        name="Damping Linear V2", default=(0.01, 0.01, 0.01))
+        name="Damping Linear V2", default=DAMPING_V2_DEFAULT)
     damping_angular_c: bpy.props.FloatVectorProperty(
-        name="Damping Angular C", default=(0.02, 0.02, 0.02))
+        name="Damping Angular C", default=DAMPING_DEFAULT)
     damping_angular_v: bpy.props.FloatVectorProperty(
-        name="Damping Angular V", default=(0.02, 0.02, 0.02))
+        name="Damping Angular V", default=DAMPING_DEFAULT)
     damping_angular_v2: bpy.props.FloatVectorProperty(
-        name="Damping Angular V2", default=(0.01, 0.01, 0.01))
+        name="Damping Angular V2", default=DAMPING_V2_DEFAULT)
 
     archetype_properties: bpy.props.PointerProperty(
         type=FragArchetypeProperties)
@@ -153,6 +157,53 @@ PAINT_LAYER_VALUES = {
     VehiclePaintLayer.INTERIOR_DASH: 7,
 }
 
+# (Fragment attribute, FragmentProperties attribute) pairs copied on import and export
+FRAGMENT_PROP_MAP = (
+    ("unknown_b0", "unk_b0"),
+    ("unknown_b8", "unk_b8"),
+    ("unknown_bc", "unk_bc"),
+    ("unknown_c0", "unk_c0"),
+    ("unknown_c4", "unk_c4"),
+    ("unknown_cc", "unk_cc"),
+    ("gravity_factor", "gravity_factor"),
+    ("buoyancy_factor", "buoyancy_factor"),
+)
+
+# Attributes shared by PhysicsLOD and LODProperties
+LOD_PROP_NAMES = (
+    "unknown_14", "unknown_18", "unknown_1c", "position_offset", "unknown_40", "unknown_50",
+    "damping_linear_c", "damping_linear_v", "damping_linear_v2",
+    "damping_angular_c", "damping_angular_v", "damping_angular_v2",
+)
+
+# Attributes shared by Archetype and FragArchetypeProperties
+ARCHETYPE_PROP_NAMES = ("name", "unknown_48", "unknown_4c", "unknown_50", "unknown_54", "inertia_tensor")
+
+# Attributes shared by PhysicsGroup and GroupProperties (the group name is handled separately on export)
+GROUP_PROP_NAMES = (
+    "glass_window_index", "glass_flags", "strength", "force_transmission_scale_up",
+    "force_transmission_scale_down", "joint_stiffness", "min_soft_angle_1", "max_soft_angle_1",
+    "max_soft_angle_2", "max_soft_angle_3", "rotation_speed", "rotation_strength",
+    "restoring_max_torque", "latch_strength", "min_damage_force", "damage_health", "unk_float_5c",
+    "unk_float_60", "unk_float_64", "unk_float_68", "unk_float_6c", "unk_float_70", "unk_float_74",
+    "unk_float_78", "unk_float_a8",
+)
+
+# Attributes shared by Window and VehicleWindowProperties
+VEH_WINDOW_PROP_NAMES = ("unk_float_17", "unk_float_18", "cracks_texture_tiling")
+
+
+CREATE_FRAGMENT_TYPE_ITEMS = (
+    (SollumType.FRAGMENT.value,
+     SOLLUMZ_UI_NAMES[SollumType.FRAGMENT], "Create a fragment object"),
+    (SollumType.FRAGLOD.value,
+     SOLLUMZ_UI_NAMES[SollumType.FRAGLOD], "Create a fragment LOD object"),
+    (SollumType.FRAGGROUP.value,
+     SOLLUMZ_UI_NAMES[SollumType.FRAGGROUP], "Create a fragment group object"),
+    (SollumType.FRAGCHILD.value,
+     SOLLUMZ_UI_NAMES[SollumType.FRAGCHILD], "Create a fragment child object"),
+)
+
 
 def update_mat_paint_name(mat: bpy.types.Material):
     """Update material name to have [PAINT_LAYER] extension at the end."""
@@ -190,16 +241,7 @@ def register():
         name="Thickness", default=0.1)
 
     bpy.types.Scene.create_fragment_type = bpy.props.EnumProperty(
-        items=[
-            (SollumType.FRAGMENT.value,
-             SOLLUMZ_UI_NAMES[SollumType.FRAGMENT], "Create a fragment object"),
-            (SollumType.FRAGLOD.value,
-             SOLLUMZ_UI_NAMES[SollumType.FRAGLOD], "Create a fragment LOD object"),
-            (SollumType.FRAGGROUP.value,
-             SOLLUMZ_UI_NAMES[SollumType.FRAGGROUP], "Create a fragment group object"),
-            (SollumType.FRAGCHILD.value,
-             SOLLUMZ_UI_NAMES[SollumType.FRAGCHILD], "Create a fragment child object"),
-        ],
+        items=CREATE_FRAGMENT_TYPE_ITEMS,
         name="Type",
         default=SollumType.FRAGMENT.value
     )
@@ -4,9 +4,19 @@ from ..ydr.ui import SOLLUMZ_PT_BONE_PANEL
 from ..ybn.ui import SOLLUMZ_PT_BOUND_PROPERTIES_PANEL
 from ..sollumz_properties import MaterialType, SollumType, BOUND_TYPES
 from ..sollumz_helper import find_sollumz_parent
-from .properties import GroupProperties, FragmentProperties, VehicleWindowProperties, VehicleLightID
+from .properties import GroupProperties, FragmentProperties, LODProperties, FragArchetypeProperties, VehicleWindowProperties, VehicleLightID
 from .operators import SOLLUMZ_OT_CREATE_FRAGMENT, SOLLUMZ_OT_CREATE_BONES_AT_OBJECTS, SOLLUMZ_OT_SET_MASS, SOLLUMZ_OT_SET_LIGHT_ID, SOLLUMZ_OT_SELECT_LIGHT_ID
 
+# Properties drawn by each panel. Computed once since the property groups never change after definition
+FRAGMENT_PANEL_PROPS = tuple(
+    prop for prop in FragmentProperties.__annotations__ if prop != "lod_properties")
+PHYS_LOD_PANEL_PROPS = tuple(
+    prop for prop in LODProperties.__annotations__ if prop != "archetype_properties")
+FRAG_ARCHETYPE_PANEL_PROPS = tuple(FragArchetypeProperties.__annotations__)
+BONE_PHYSICS_PANEL_PROPS = tuple(
+    prop for prop in GroupProperties.__annotations__ if prop != "mass")
+VEH_WINDOW_PANEL_PROPS = tuple(VehicleWindowProperties.__annotations__)
+
 
 class SOLLUMZ_PT_FRAGMENT_TOOL_PANEL(bpy.types.Panel):
     bl_label = "Fragments"
@@ -146,10 +156,7 @@ class SOLLUMZ_PT_FRAGMENT_PANEL(bpy.types.Panel):
 
         obj = context.active_object
 
-        for prop in FragmentProperties.__annotations__:
-            if prop == "lod_properties":
-                continue
-
+        for prop in FRAGMENT_PANEL_PROPS:
             self.layout.prop(obj.fragment_properties, prop)
 
 
@@ -170,9 +177,7 @@ class SOLLUMZ_PT_PHYS_LODS_PANEL(bpy.types.Panel):
         obj = context.view_layer.objects.active
         lod_props = obj.fragment_properties.lod_properties
 
-        for prop in lod_props.__annotations__:
-            if prop == "archetype_properties":
-                continue
+        for prop in PHYS_LOD_PANEL_PROPS:
             layout.prop(lod_props, prop)
 
 
@@ -193,7 +198,7 @@ class SOLLUMZ_PT_FRAG_ARCHETYPE_PANEL(bpy.types.Panel):
         obj = context.view_layer.objects.active
         arch_props = obj.fragment_properties.lod_properties.archetype_properties
 
-        for prop in arch_props.__annotations__:
+        for prop in FRAG_ARCHETYPE_PANEL_PROPS:
             layout.prop(arch_props, prop)
 
 
@@ -239,10 +244,7 @@ class SOLLUMZ_PT_BONE_PHYSICS_SUBPANEL(bpy.types.Panel):
 
         bone = context.active_bone
 
-        for prop in GroupProperties.__annotations__:
-            if prop == "mass":
-                continue
-
+        for prop in BONE_PHYSICS_PANEL_PROPS:
             layout.prop(bone.group_properties, prop)
 
 
@@ -304,7 +306,7 @@ class SOLLUMZ_PT_VEH_WINDOW_PANEL(bpy.types.Panel):
 
         layout.prop(child_props, "window_mat")
 
-        for prop in VehicleWindowProperties.__annotations__:
+        for prop in VEH_WINDOW_PANEL_PROPS:
             self.layout.prop(obj.vehicle_window_properties, prop)
 
 
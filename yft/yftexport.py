@@ -1,6 +1,7 @@
 from copy import copy
 from tokenize import group
 import bpy
+import numpy as np
 from typing import Optional
 from collections import defaultdict
 from mathutils import Matrix, Vector
@@ -14,7 +15,7 @@ from ..cwxml.drawable import Bone, Drawable, ShaderGroup, VectorShaderParameter
 from ..tools.blenderhelper import get_bone_pose_matrix, remove_number_suffix, delete_hierarchy, get_child_of_bone
 from ..tools.fragmenthelper import image_to_shattermap
 from ..tools.meshhelper import calculate_inertia
-from ..tools.utils import prop_array_to_vector, reshape_mat_4x3, vector_inv, reshape_mat_3x4
+from ..tools.utils import prop_array_to_vector, reshape_mat_4x3, reshape_mat_3x4
 from ..sollumz_helper import get_parent_inverse, get_sollumz_materials
 from ..sollumz_properties import BOUND_TYPES, SollumType, MaterialType, LODLevel, VehiclePaintLayer
 from ..sollumz_preferences import get_export_settings
@@ -22,7 +23,7 @@ from ..ybn.ybnexport import has_col_mats, bound_geom_has_mats
 from ..ydr.ydrexport import create_drawable_xml, write_embedded_textures, get_bone_index, create_model_xml, append_model_xml, set_drawable_xml_extents
 from ..ydr.lights import create_xml_lights
 from .. import logger
-from .properties import LODProperties, FragArchetypeProperties, GroupProperties, PAINT_LAYER_VALUES
+from .properties import LODProperties, FragArchetypeProperties, GroupProperties, PAINT_LAYER_VALUES, FRAGMENT_PROP_MAP, GROUP_PROP_NAMES, VEH_WINDOW_PROP_NAMES
 
 
 def export_yft(frag_obj: bpy.types.Object, filepath: str):
@@ -180,6 +181,9 @@ def copy_hierarchy(obj: bpy.types.Object, armature_obj: bpy.types.Object):
 
 
 def remove_non_hi_lods(drawable_obj: bpy.types.Object):
+    # Models without a very high LOD are removed together once the loop is done
+    objs_to_remove: list[bpy.types.Object] = []
+
     for model_obj in drawable_obj.children:
         if model_obj.sollum_type != SollumType.DRAWABLE_MODEL:
             continue
@@ -187,7 +191,7 @@ def remove_non_hi_lods(drawable_obj: bpy.types.Object):
         very_high_lod = model_obj.sollumz_lods.get_lod(LODLevel.VERYHIGH)
 
         if very_high_lod is None or very_high_lod.mesh is None:
-            bpy.data.objects.remove(model_obj)
+            objs_to_remove.append(model_obj)
             continue
 
         lod_props = model_obj.sollumz_lods
@@ -199,6 +203,9 @@ def remove_non_hi_lods(drawable_obj: bpy.types.Object):
             if lod.level != LODLevel.HIGH and lod.mesh is not None:
                 lod.mesh = None
 
+    if objs_to_remove:
+        bpy.data.batch_remove(objs_to_remove)
+
 
 def copy_phys_xml(phys_xml: Physics, lod_props: LODProperties):
     new_phys_xml = Physics()
@@ -321,10 +328,14 @@ def set_arch_mass_inertia(frag_obj: bpy.types.Object, arch_xml: Archetype, phys_
         inertia = calculate_inertia(
             arch_xml.bounds.box_min, arch_xml.bounds.box_max) * mass
     else:
-        inertia = prop_array_to_vector(archetype_props.inertia_tensor)
+        inertia = archetype_props.inertia_tensor
 
-    arch_xml.inertia_tensor = inertia
-    arch_xml.inertia_tensor_inv = vector_inv(inertia)
+    inertia_arr = np.array(inertia[:3], dtype=np.float64)
+    inertia_inv_arr = np.divide(1, inertia_arr, out=np.zeros_like(
+        inertia_arr), where=inertia_arr != 0)
+
+    arch_xml.inertia_tensor = Vector(inertia_arr)
+    arch_xml.inertia_tensor_inv = Vector(inertia_inv_arr)
 
 
 def calculate_arch_mass(phys_children: list[PhysicsChild]) -> float:
@@ -358,12 +369,13 @@ def create_collision_xml(frag_obj: bpy.types.Object, arch_xml: Archetype, auto_c
 def create_phys_xml_groups(frag_obj: bpy.types.Object, lod_xml: PhysicsLOD):
     group_ind_by_name: dict[str, int] = {}
     groups_by_bone: dict[int, list[PhysicsGroup]] = defaultdict(list)
+    col_bone_names = get_col_bone_names(frag_obj)
 
     for bone in frag_obj.data.bones:
         if not bone.sollumz_use_physics:
             continue
 
-        if not does_bone_have_collision(bone.name, frag_obj):
+        if bone.name not in col_bone_names:
             logger.warning(
                 f"Bone '{bone.name}' has physics enabled, but no associated collision! A collision must be linked to the bone for physics to work.")
             continue
@@ -407,17 +419,20 @@ def create_phys_xml_groups(frag_obj: bpy.types.Object, lod_xml: PhysicsLOD):
     return lod_xml.groups
 
 
-def does_bone_have_collision(bone_name: str, frag_obj: bpy.types.Object):
-    col_objs = [
-        obj for obj in frag_obj.children_recursive if obj.sollum_type in BOUND_TYPES]
+def get_col_bone_names(frag_obj: bpy.types.Object) -> set[str]:
+    """Get the names of all bones that have a collision linked to them."""
+    bone_names: set[str] = set()
+
+    for obj in frag_obj.children_recursive:
+        if obj.sollum_type not in BOUND_TYPES:
+            continue
 
-    for obj in col_objs:
         bone = get_child_of_bone(obj)
 
-        if bone is not None and bone.name == bone_name:
-            return True
+        if bone is not None:
+            bone_names.add(bone.name)
 
-    return False
+    return bone_names
 
 
 def calculate_group_masses(lod_xml: PhysicsLOD):
@@ -429,19 +444,24 @@ def calculate_group_masses(lod_xml: PhysicsLOD):
 def create_phys_child_xmls(frag_obj: bpy.types.Object, lod_xml: PhysicsLOD, bones_xml: list[Bone], materials: list[bpy.types.Material]):
     child_meshes = get_child_meshes(frag_obj)
     child_cols = get_child_cols(frag_obj)
+    group_ind_by_name: dict[str, int] = {
+        group.name: i for i, group in enumerate(lod_xml.groups)}
+    child_matrices: list[Matrix] = []
 
     for bone_name, objs in child_cols.items():
+        bone: bpy.types.Bone = frag_obj.data.bones.get(bone_name)
+        bone_index = get_bone_index(frag_obj.data, bone) or 0
+        bone_tag = bones_xml[bone_index].tag
+        group_index = group_ind_by_name.get(bone_name, -1)
+
         for obj in objs:
             child_index = len(lod_xml.children)
 
-            bone: bpy.types.Bone = frag_obj.data.bones.get(bone_name)
-            bone_index = get_bone_index(frag_obj.data, bone) or 0
-
             child_xml = PhysicsChild()
-            child_xml.group_index = get_bone_group_index(lod_xml, bone_name)
+            child_xml.group_index = group_index
             child_xml.pristine_mass = obj.child_properties.mass
             child_xml.damaged_mass = child_xml.pristine_mass
-            child_xml.bone_tag = bones_xml[bone_index].tag
+            child_xml.bone_tag = bone_tag
 
             inertia_tensor = get_child_inertia(
                 lod_xml.archetype, child_xml, child_index)
@@ -456,10 +476,12 @@ def create_phys_child_xmls(frag_obj: bpy.types.Object, lod_xml: PhysicsLOD, bone
 
             create_phys_child_drawable(child_xml, materials, mesh_objs)
 
-            create_child_transforms_xml(composite_matrix, lod_xml)
+            child_matrices.append(composite_matrix)
 
             lod_xml.children.append(child_xml)
 
+    create_child_transforms_xml(child_matrices, lod_xml)
+
 
 def get_child_inertia(arch_xml: Archetype, child_xml: PhysicsChild, child_index: int):
     if not arch_xml.bounds or child_index >= len(arch_xml.bounds.children):
@@ -517,15 +539,6 @@ def get_child_meshes(frag_obj: bpy.types.Object):
     return child_meshes_by_bone
 
 
-def get_bone_group_index(lod_xml: PhysicsLOD, bone_name: str):
-    """Get index of group named ``bone_name`` (expects groups to have already been created in ``lod_xml``)."""
-    for i, group in enumerate(lod_xml.groups):
-        if group.name == bone_name:
-            return i
-
-    return -1
-
-
 def create_child_mat_arrays(children: list[PhysicsChild]):
     """Create the matrix arrays for each child. This appears to be in the first child of multiple children that
     share the same group. Each matrix in the array is just the matrix for each child in that group."""
@@ -645,29 +658,14 @@ def create_window_shattermap(col_obj: bpy.types.Object, window_xml: Window):
 
 
 def set_veh_window_xml_properties(window_xml: Window, window_obj: bpy.types.Object):
-    window_xml.unk_float_17 = window_obj.vehicle_window_properties.unk_float_17
-    window_xml.unk_float_18 = window_obj.vehicle_window_properties.unk_float_18
-    window_xml.cracks_texture_tiling = window_obj.vehicle_window_properties.cracks_texture_tiling
-
-
-def calculate_shattermap_projection(obj: bpy.types.Object, img: bpy.types.Image, bone_matrix: Matrix):
-    mesh = obj.data
+    window_props = window_obj.vehicle_window_properties
 
-    v1 = Vector()
-    v2 = Vector()
-    v3 = Vector()
+    for name in VEH_WINDOW_PROP_NAMES:
+        setattr(window_xml, name, getattr(window_props, name))
 
-    # Get three corner vectors
-    for loop in mesh.loops:
-        uv = mesh.uv_layers[0].data[loop.index].uv
-        vert_pos = mesh.vertices[loop.vertex_index].co
 
-        if uv.x == 0 and uv.y == 1:
-            v1 = vert_pos
-        elif uv.x == 1 and uv.y == 1:
-            v2 = vert_pos
-        elif uv.x == 0 and uv.y == 0:
-            v3 = vert_pos
+def calculate_shattermap_projection(obj: bpy.types.Object, img: bpy.types.Image, bone_matrix: Matrix):
+    v1, v2, v3 = get_shattermap_corners(obj.data)
 
     resx = img.size[0]
     resy = img.size[1]
@@ -698,6 +696,37 @@ def calculate_shattermap_projection(obj: bpy.types.Object, img: bpy.types.Image,
     return matrix
 
 
+def get_shattermap_corners(mesh: bpy.types.Mesh) -> tuple[Vector, Vector, Vector]:
+    """Get the top left, top right and bottom left corners of the shattermap mesh based on its UVs."""
+    num_loops = len(mesh.loops)
+
+    uvs = np.empty(num_loops * 2, dtype=np.float32)
+    mesh.uv_layers[0].data.foreach_get("uv", uvs)
+    uvs = uvs.reshape((num_loops, 2))
+
+    vert_inds = np.empty(num_loops, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", vert_inds)
+
+    positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", positions)
+    positions = positions.reshape((len(mesh.vertices), 3))
+
+    # Key each loop by the corner of the UV square it lies on (2 * v + u), -1 if it is not on a corner
+    is_corner = np.all((uvs == 0) | (uvs == 1), axis=1)
+    corner_keys = np.where(is_corner, uvs[:, 1].astype(
+        np.int32) * 2 + uvs[:, 0].astype(np.int32), -1)
+
+    def get_corner(key: int):
+        loop_inds = np.flatnonzero(corner_keys == key)
+
+        if loop_inds.size == 0:
+            return Vector()
+
+        return Vector(positions[vert_inds[loop_inds[-1]]])
+
+    return get_corner(2), get_corner(3), get_corner(0)
+
+
 def get_shattermap_obj(col_obj: bpy.types.Object) -> Optional[bpy.types.Object]:
     for child in col_obj.children:
         if child.sollum_type == SollumType.SHATTERMAP:
@@ -736,21 +765,17 @@ def get_window_geometry_index(drawable_xml: Drawable, window_shader_index: int):
     return 0
 
 
-def create_child_transforms_xml(child_matrix: Matrix, lod_xml: PhysicsLOD):
-    offset = lod_xml.position_offset
-
-    matrix = child_matrix.copy()
-    a = matrix[3][0] - offset.x
-    b = matrix[3][1] - offset.y
-    c = matrix[3][2] - offset.z
-    matrix[3][0] = a
-    matrix[3][1] = b
-    matrix[3][2] = c
+def create_child_transforms_xml(child_matrices: list[Matrix], lod_xml: PhysicsLOD):
+    """Create a transform for each child in ``child_matrices``, offset by the LOD position offset."""
+    if not child_matrices:
+        return
 
-    transform_xml = Transform("Item", matrix)
-    lod_xml.transforms.append(transform_xml)
+    matrices = np.array(child_matrices, dtype=np.float64)
+    # Child transforms are stored transposed, so the translation is in the last row
+    matrices[:, 3, :3] -= np.array(lod_xml.position_offset, dtype=np.float64)
 
-    return transform_xml
+    for matrix in matrices:
+        lod_xml.transforms.append(Transform("Item", Matrix(matrix)))
 
 
 def create_bone_transforms_xml(frag_xml: Fragment):
@@ -829,39 +854,12 @@ def set_archetype_xml_properties(archetype_props: FragArchetypeProperties, arch_
 
 
 def set_group_xml_properties(group_props: GroupProperties, group_xml: PhysicsGroup):
-    group_xml.glass_window_index = group_props.glass_window_index
-    group_xml.glass_flags = group_props.glass_flags
-    group_xml.strength = group_props.strength
-    group_xml.force_transmission_scale_up = group_props.force_transmission_scale_up
-    group_xml.force_transmission_scale_down = group_props.force_transmission_scale_down
-    group_xml.joint_stiffness = group_props.joint_stiffness
-    group_xml.min_soft_angle_1 = group_props.min_soft_angle_1
-    group_xml.max_soft_angle_1 = group_props.max_soft_angle_1
-    group_xml.max_soft_angle_2 = group_props.max_soft_angle_2
-    group_xml.max_soft_angle_3 = group_props.max_soft_angle_3
-    group_xml.rotation_speed = group_props.rotation_speed
-    group_xml.rotation_strength = group_props.rotation_strength
-    group_xml.restoring_max_torque = group_props.restoring_max_torque
-    group_xml.latch_strength = group_props.latch_strength
-    group_xml.min_damage_force = group_props.min_damage_force
-    group_xml.damage_health = group_props.damage_health
-    group_xml.unk_float_5c = group_props.unk_float_5c
-    group_xml.unk_float_60 = group_props.unk_float_60
-    group_xml.unk_float_64 = group_props.unk_float_64
-    group_xml.unk_float_68 = group_props.unk_float_68
-    group_xml.unk_float_6c = group_props.unk_float_6c
-    group_xml.unk_float_70 = group_props.unk_float_70
-    group_xml.unk_float_74 = group_props.unk_float_74
-    group_xml.unk_float_78 = group_props.unk_float_78
-    group_xml.unk_float_a8 = group_props.unk_float_a8
+    for name in GROUP_PROP_NAMES:
+        setattr(group_xml, name, getattr(group_props, name))
 
 
 def set_frag_xml_properties(frag_obj: bpy.types.Object, frag_xml: Fragment):
-    frag_xml.unknown_b0 = frag_obj.fragment_properties.unk_b0
-    frag_xml.unknown_b8 = frag_obj.fragment_properties.unk_b8
-    frag_xml.unknown_bc = frag_obj.fragment_properties.unk_bc
-    frag_xml.unknown_c0 = frag_obj.fragment_properties.unk_c0
-    frag_xml.unknown_c4 = frag_obj.fragment_properties.unk_c4
-    frag_xml.unknown_cc = frag_obj.fragment_properties.unk_cc
-    frag_xml.gravity_factor = frag_obj.fragment_properties.gravity_factor
-    frag_xml.buoyancy_factor = frag_obj.fragment_properties.buoyancy_factor
+    frag_props = frag_obj.fragment_properties
+
+    for xml_name, prop_name in FRAGMENT_PROP_MAP:
+        setattr(frag_xml, xml_name, getattr(frag_props, prop_name))
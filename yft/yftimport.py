@@ -1,14 +1,15 @@
 import os
 import bpy
 import numpy as np
+from numpy.typing import NDArray
 from traceback import format_exc
 from mathutils import Matrix, Vector
 from typing import Optional
 
 from .fragment_merger import FragmentMerger
-from ..tools.blenderhelper import add_child_of_bone_constraint, create_empty_object, material_from_image, create_blender_object
+from ..tools.blenderhelper import add_child_of_bone_constraint, create_empty_object, material_from_image
 from ..tools.meshhelper import create_uv_attr
-from ..tools.utils import multiply_homogeneous, get_filename
+from ..tools.utils import get_filename, multiply_homogeneous_batch
 from ..sollumz_properties import BOUND_TYPES, SollumType, MaterialType, VehiclePaintLayer
 from ..sollumz_preferences import get_import_settings
 from ..cwxml.fragment import YFT, Fragment, PhysicsLOD, PhysicsGroup, PhysicsChild, Window, Archetype
@@ -17,7 +18,7 @@ from ..ydr.ydrimport import apply_translation_limits, create_armature_obj_from_s
 from ..ybn.ybnimport import create_bound_object, set_bound_properties
 from ..ydr.ydrexport import calculate_bone_tag
 from .. import logger
-from .properties import LODProperties, FragArchetypeProperties, PAINT_LAYER_VALUES
+from .properties import LODProperties, FragArchetypeProperties, PAINT_LAYER_VALUES, FRAGMENT_PROP_MAP, LOD_PROP_NAMES, ARCHETYPE_PROP_NAMES, GROUP_PROP_NAMES, VEH_WINDOW_PROP_NAMES
 from ..tools.blenderhelper import get_child_of_bone
 
 
@@ -183,11 +184,15 @@ def create_frag_collisions(frag_xml: Fragment, frag_obj: bpy.types.Object) -> bp
     set_bound_properties(bounds_xml, composite_obj)
     composite_obj.parent = frag_obj
 
+    children_xml = frag_xml.physics.lod1.children
+    bones_by_tag = get_bones_by_tag(frag_xml)
+    bound_objs: list[bpy.types.Object] = []
+
     for i, bound_xml in enumerate(bounds_xml.children):
         bound_obj = create_bound_object(bound_xml)
-        bound_obj.parent = composite_obj
+        bound_objs.append(bound_obj)
 
-        bone = find_bound_bone(i, frag_xml)
+        bone = find_bound_bone(i, children_xml, bones_by_tag)
         if bone is None:
             continue
 
@@ -197,22 +202,31 @@ def create_frag_collisions(frag_xml: Fragment, frag_obj: bpy.types.Object) -> bp
             bound_obj.data.name = bound_obj.name
 
         add_col_bone_constraint(bound_obj, frag_obj, bone.name)
-        bound_obj.child_properties.mass = frag_xml.physics.lod1.children[i].pristine_mass
+        bound_obj.child_properties.mass = children_xml[i].pristine_mass
+
+    # Parent all bounds in one pass once they have all been created
+    for bound_obj in bound_objs:
+        bound_obj.parent = composite_obj
 
+    return composite_obj
 
-def find_bound_bone(bound_index: int, frag_xml: Fragment) -> Bone | None:
-    """Get corresponding bound bone based on children"""
-    children = frag_xml.physics.lod1.children
 
-    if bound_index >= len(children):
-        return
+def get_bones_by_tag(frag_xml: Fragment) -> dict[int, Bone]:
+    """Map each bone tag in the fragment skeleton to its bone. The first bone wins if a tag is repeated."""
+    bones_by_tag: dict[int, Bone] = {}
 
-    corresponding_child = children[bound_index]
     for bone in frag_xml.drawable.skeleton.bones:
-        if bone.tag != corresponding_child.bone_tag:
-            continue
+        bones_by_tag.setdefault(bone.tag, bone)
+
+    return bones_by_tag
+
+
+def find_bound_bone(bound_index: int, children_xml: list[PhysicsChild], bones_by_tag: dict[int, Bone]) -> Bone | None:
+    """Get corresponding bound bone based on children"""
+    if bound_index >= len(children_xml):
+        return
 
-        return bone
+    return bones_by_tag.get(children_xml[bound_index].bone_tag)
 
 
 def add_col_bone_constraint(bound_obj: bpy.types.Object, frag_obj: bpy.types.Object, bone_name: str):
@@ -230,31 +244,40 @@ def create_phys_child_meshes(frag_xml: Fragment, frag_obj: bpy.types.Object, dra
     """Create all Fragment.Physics.LOD1.Children meshes. (Only LOD1 currently supported)"""
     lod_xml = frag_xml.physics.lod1
     children_xml: list[PhysicsChild] = lod_xml.children
-    bones = frag_xml.drawable.skeleton.bones
+    # Same map as create_frag_collisions, so a child mesh is always attached to the same bone as its collision, even
+    # when a bone tag is repeated (the first bone with the tag is used)
+    bones_by_tag = get_bones_by_tag(frag_xml)
 
-    bone_name_by_tag: dict[str, Bone] = {
-        bone.tag: bone.name for bone in bones}
-
-    child_meshes: list[bpy.types.Object] = []
+    # Resolve which children have meshes and the bones they attach to before creating any Blender data
+    child_drawables: list[tuple[Drawable, str]] = []
 
     for child_xml in children_xml:
         if child_xml.drawable.is_empty:
             continue
 
-        if child_xml.bone_tag not in bone_name_by_tag:
+        bone = bones_by_tag.get(child_xml.bone_tag)
+
+        if bone is None:
             logger.warning(
                 "A fragment child has an invalid bone tag! Skipping...")
             continue
 
-        bone_name = bone_name_by_tag[child_xml.bone_tag]
+        child_drawables.append((child_xml.drawable, bone.name))
+
+    child_meshes: list[bpy.types.Object] = []
 
-        create_phys_child_models(
-            child_xml.drawable, frag_obj, materials, bone_name, drawable_obj)
+    for child_drawable_xml, bone_name in child_drawables:
+        child_meshes.extend(create_phys_child_models(
+            child_drawable_xml, frag_obj, materials, bone_name))
+
+    # Parent all child meshes in one pass once they have all been created
+    for child_obj in child_meshes:
+        child_obj.parent = drawable_obj
 
     return child_meshes
 
 
-def create_phys_child_models(drawable_xml: Drawable, frag_obj: bpy.types.Object, materials: list[bpy.types.Material], bone_name: str, drawable_obj: bpy.types.Object):
+def create_phys_child_models(drawable_xml: Drawable, frag_obj: bpy.types.Object, materials: list[bpy.types.Material], bone_name: str):
     """Create a single physics child mesh"""
     # There is usually only one drawable model in each frag child
     child_objs = create_drawable_models(
@@ -264,15 +287,19 @@ def create_phys_child_models(drawable_xml: Drawable, frag_obj: bpy.types.Object,
         add_child_of_bone_constraint(child_obj, frag_obj, bone_name)
 
         child_obj.sollumz_is_physics_child_mesh = True
-        child_obj.parent = drawable_obj
 
     return child_objs
 
 
 def create_vehicle_windows(frag_xml: Fragment, frag_obj: bpy.types.Object, materials: list[bpy.types.Material]):
-    for window_xml in frag_xml.vehicle_glass_windows:
+    shattermap_objs: list[bpy.types.Object] = []
+    proj_mats_inv = get_window_projection_matrices(frag_xml.vehicle_glass_windows)
+    bpy_bones = frag_obj.data.bones
+    bpy_bones_by_tag = get_bpy_bones_by_tag(bpy_bones)
+
+    for window_xml, proj_mat_inv in zip(frag_xml.vehicle_glass_windows, proj_mats_inv):
         window_bone = get_window_bone(
-            window_xml, frag_xml, frag_obj.data.bones)
+            window_xml, frag_xml, bpy_bones, bpy_bones_by_tag)
         col_obj = get_window_col(frag_obj, window_bone.name)
 
         window_name = f"{window_bone.name}_shattermap"
@@ -292,11 +319,19 @@ def create_vehicle_windows(frag_xml: Fragment, frag_obj: bpy.types.Object, mater
 
         if window_xml.shattermap:
             shattermap_obj = create_shattermap_obj(
-                window_xml, window_name, window_bone.matrix_local.translation)
-            shattermap_obj.parent = col_obj
+                window_xml, window_name, window_bone.matrix_local.translation, proj_mat_inv)
+
+            if shattermap_obj is not None:
+                shattermap_obj.parent = col_obj
+                shattermap_objs.append(shattermap_obj)
 
         set_veh_window_properties(window_xml, col_obj)
 
+    # Link all shattermaps to the scene together once every window has been created
+    collection_objs = bpy.context.collection.objects
+    for shattermap_obj in shattermap_objs:
+        collection_objs.link(shattermap_obj)
+
 
 def get_window_col(frag_obj: bpy.types.Object, bone_name: str) -> Optional[bpy.types.Object]:
     for obj in frag_obj.children_recursive:
@@ -315,7 +350,7 @@ def get_veh_window_material(window_xml: Window, drawable_xml: Drawable, material
     return get_geometry_material(drawable_xml, materials, geometry_index)
 
 
-def get_window_bone(window_xml: Window, frag_xml: Fragment, bpy_bones: bpy.types.ArmatureBones) -> bpy.types.Bone:
+def get_window_bone(window_xml: Window, frag_xml: Fragment, bpy_bones: bpy.types.ArmatureBones, bpy_bones_by_tag: dict[int, bpy.types.Bone]) -> bpy.types.Bone:
     """Get bone connected to window based on the bone tag of the physics child associated with the window."""
     children_xml: list[PhysicsChild] = frag_xml.physics.lod1.children
 
@@ -324,27 +359,31 @@ def get_window_bone(window_xml: Window, frag_xml: Fragment, bpy_bones: bpy.types
     if child_id < 0 or child_id >= len(children_xml):
         return bpy_bones[0]
 
-    child_xml = children_xml[child_id]
+    # Return root bone if no bone is found
+    return bpy_bones_by_tag.get(children_xml[child_id].bone_tag, bpy_bones[0])
 
-    for bone in bpy_bones:
-        if calculate_bone_tag(bone.name) != child_xml.bone_tag:
-            continue
 
-        return bone
+def get_bpy_bones_by_tag(bpy_bones: bpy.types.ArmatureBones) -> dict[int, bpy.types.Bone]:
+    """Map the tag calculated from each bone name to its bone. The first bone wins if a tag is repeated."""
+    bpy_bones_by_tag: dict[int, bpy.types.Bone] = {}
 
-    # Return root bone if no bone is found
-    return bpy_bones[0]
+    for bone in bpy_bones:
+        bpy_bones_by_tag.setdefault(calculate_bone_tag(bone.name), bone)
 
+    return bpy_bones_by_tag
 
-def create_shattermap_obj(window_xml: Window, name: str, window_location: Vector):
+
+def create_shattermap_obj(window_xml: Window, name: str, window_location: Vector, proj_mat_inv: NDArray[np.float64]) -> bpy.types.Object | None:
+    """Create a shattermap object for the window. The object is not linked to the scene."""
     try:
-        mesh = create_shattermap_mesh(window_xml, name, window_location)
+        mesh = create_shattermap_mesh(window_xml, name, window_location, proj_mat_inv)
     except:
         logger.error(
             f"Error during creation of vehicle window mesh:\n{format_exc()}")
         return
 
-    shattermap_obj = create_blender_object(SollumType.SHATTERMAP, name, mesh)
+    shattermap_obj = bpy.data.objects.new(name, mesh)
+    shattermap_obj.sollum_type = SollumType.SHATTERMAP
 
     if window_xml.shattermap:
         shattermap_mat = shattermap_to_material(window_xml.shattermap, name)
@@ -353,13 +392,21 @@ def create_shattermap_obj(window_xml: Window, name: str, window_location: Vector
     return shattermap_obj
 
 
-def create_shattermap_mesh(window_xml: Window, name: str, window_location: Vector):
-    verts = calculate_window_verts(window_xml)
-    faces = [[0, 1, 2, 3]]
+def create_shattermap_mesh(window_xml: Window, name: str, window_location: Vector, proj_mat_inv: NDArray[np.float64]):
+    # Window location is folded into the vertices so the mesh doesn't need a separate transform pass
+    verts = calculate_window_verts(window_xml, proj_mat_inv) - np.array(window_location, dtype=np.float64)
 
     mesh = bpy.data.meshes.new(name)
-    mesh.from_pydata(verts, [], faces)
-    mesh.transform(Matrix.Translation(-window_location))
+    mesh.vertices.add(4)
+    mesh.loops.add(4)
+    mesh.polygons.add(1)
+
+    mesh.vertices.foreach_set("co", verts.astype(np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", np.arange(4, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_start", np.zeros(1, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_total", np.full(1, 4, dtype=np.int32))
+
+    mesh.update(calc_edges=True)
 
     uvs = np.array([[0.0, 1.0], [0.0, 0.0], [1.0, 0.0],
                    [1.0, 1.0]], dtype=np.float64)
@@ -368,37 +415,51 @@ def create_shattermap_mesh(window_xml: Window, name: str, window_location: Vecto
     return mesh
 
 
-def calculate_window_verts(window_xml: Window):
-    """Calculate the 4 vertices of the window from the projection matrix."""
-    proj_mat = get_window_projection_matrix(window_xml)
+def calculate_window_verts(window_xml: Window, proj_mat_inv: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Calculate the 4 vertices of the window from its inverted projection matrix."""
+    width = window_xml.width / 2
+    height = window_xml.height
 
-    min = Vector((0, 0, 0))
-    max = Vector((window_xml.width / 2, window_xml.height, 1))
+    corners = np.array([
+        [0, 0, 0],
+        [0, height, 0],
+        [width, height, 0],
+        [width, 0, 0],
+    ], dtype=np.float64)
 
-    v0 = multiply_homogeneous(proj_mat, Vector((min.x, min.y, 0)))
-    v1 = multiply_homogeneous(proj_mat, Vector((min.x, max.y, 0)))
-    v2 = multiply_homogeneous(proj_mat, Vector((max.x, max.y, 0)))
-    v3 = multiply_homogeneous(proj_mat, Vector((max.x, min.y, 0)))
+    return multiply_homogeneous_batch(proj_mat_inv, corners)
 
-    return v0, v1, v2, v3
 
-
-def get_window_projection_matrix(window_xml: Window):
-    proj_mat: Matrix = window_xml.projection_matrix
+def get_window_projection_matrices(windows_xml: list[Window]) -> NDArray[np.float64]:
+    """Get the transposed inverse of every window projection matrix as a (N, 4, 4) array."""
+    proj_mats = np.array([window_xml.projection_matrix for window_xml in windows_xml],
+                         dtype=np.float64).reshape((-1, 4, 4))
     # proj_mat[3][3] is currently an unknown value so it is set to 1 (CW does the same)
-    proj_mat[3][3] = 1
+    proj_mats[:, 3, 3] = 1
+    proj_mats = proj_mats.transpose((0, 2, 1))
 
-    return proj_mat.transposed().inverted_safe()
+    try:
+        return np.linalg.inv(proj_mats)
+    except np.linalg.LinAlgError:
+        # At least one matrix is singular, fall back to inverting each one with mathutils
+        return np.array([Matrix(proj_mat).inverted_safe() for proj_mat in proj_mats], dtype=np.float64).reshape((-1, 4, 4))
 
 
-def get_rgb(value):
-    if value == "##":
-        return [0, 0, 0, 1]
-    elif value == "--":
-        return [1, 1, 1, 1]
-    else:
-        value = int(value, 16)
-        return [value / 255, value / 255, value / 255, 1]
+def _build_shattermap_nibble_lut() -> NDArray[np.float32]:
+    # Each pixel is a pair of hex digits, "##" for 0 or "--" for 255. Mapping "#" to 0 and "-" to 15 lets every pair be
+    # decoded as high * 16 + low with this single table
+    nibble_lut = np.zeros(256, dtype=np.float32)
+    for i, char in enumerate("0123456789abcdef"):
+        nibble_lut[ord(char)] = i
+        nibble_lut[ord(char.upper())] = i
+    nibble_lut[ord("-")] = 15
+    nibble_lut.flags.writeable = False
+
+    return nibble_lut
+
+
+# Maps each shattermap character code to its nibble value
+SHATTERMAP_NIBBLE_LUT = _build_shattermap_nibble_lut()
 
 
 def shattermap_to_image(shattermap, name):
@@ -407,16 +468,13 @@ def shattermap_to_image(shattermap, name):
 
     img = bpy.data.images.new(name, width, height)
 
-    pixels = []
-    i = 0
-    for row in reversed(shattermap):
-        frow = [row[x:x + 2] for x in range(0, len(row), 2)]
-        for value in frow:
-            pixels.append(get_rgb(value))
-            i += 1
+    chars = np.frombuffer("".join(reversed(shattermap)).encode("ascii"), dtype=np.uint8).reshape((-1, 2))
+    values = (SHATTERMAP_NIBBLE_LUT[chars[:, 0]] * 16 + SHATTERMAP_NIBBLE_LUT[chars[:, 1]]) / 255
 
-    pixels = [chan for px in pixels for chan in px]
-    img.pixels = pixels
+    pixels = np.ones((len(values), 4), dtype=np.float32)
+    pixels[:, :3] = values[:, None]
+
+    img.pixels.foreach_set(pixels.ravel())
     return img
 
 
@@ -430,19 +488,21 @@ def shattermap_to_material(shattermap, name):
 
 def get_geometry_material(drawable_xml: Drawable, materials: list[bpy.types.Material], geometry_index: int) -> bpy.types.Material | None:
     """Get the material that the given geometry uses."""
-    for dmodel in drawable_xml.drawable_models_high:
-        geometries = dmodel.geometries
+    # Only the first high LOD model is checked
+    if not drawable_xml.drawable_models_high:
+        return None
 
-        if geometry_index > len(geometries):
-            return None
+    geometries = drawable_xml.drawable_models_high[0].geometries
 
-        geometry = geometries[geometry_index]
-        shader_index = geometry.shader_index
+    if geometry_index >= len(geometries):
+        return None
 
-        if shader_index > len(materials):
-            return None
+    shader_index = geometries[geometry_index].shader_index
 
-        return materials[shader_index]
+    if shader_index >= len(materials):
+        return None
+
+    return materials[shader_index]
 
 
 def create_frag_lights(frag_xml: Fragment, frag_obj: bpy.types.Object):
@@ -452,70 +512,32 @@ def create_frag_lights(frag_xml: Fragment, frag_obj: bpy.types.Object):
 
 
 def set_fragment_properties(frag_xml: Fragment, frag_obj: bpy.types.Object):
-    frag_obj.fragment_properties.unk_b0 = frag_xml.unknown_b0
-    frag_obj.fragment_properties.unk_b8 = frag_xml.unknown_b8
-    frag_obj.fragment_properties.unk_bc = frag_xml.unknown_bc
-    frag_obj.fragment_properties.unk_c0 = frag_xml.unknown_c0
-    frag_obj.fragment_properties.unk_c4 = frag_xml.unknown_c4
-    frag_obj.fragment_properties.unk_cc = frag_xml.unknown_cc
-    frag_obj.fragment_properties.gravity_factor = frag_xml.gravity_factor
-    frag_obj.fragment_properties.buoyancy_factor = frag_xml.buoyancy_factor
+    frag_props = frag_obj.fragment_properties
+
+    for src, dst in FRAGMENT_PROP_MAP:
+        setattr(frag_props, dst, getattr(frag_xml, src))
 
 
 def set_lod_properties(lod_xml: PhysicsLOD, lod_props: LODProperties):
-    lod_props.unknown_14 = lod_xml.unknown_14
-    lod_props.unknown_18 = lod_xml.unknown_18
-    lod_props.unknown_1c = lod_xml.unknown_1c
-    lod_props.position_offset = lod_xml.position_offset
-    lod_props.unknown_40 = lod_xml.unknown_40
-    lod_props.unknown_50 = lod_xml.unknown_50
-    lod_props.damping_linear_c = lod_xml.damping_linear_c
-    lod_props.damping_linear_v = lod_xml.damping_linear_v
-    lod_props.damping_linear_v2 = lod_xml.damping_linear_v2
-    lod_props.damping_angular_c = lod_xml.damping_angular_c
-    lod_props.damping_angular_v = lod_xml.damping_angular_v
-    lod_props.damping_angular_v2 = lod_xml.damping_angular_v2
+    for name in LOD_PROP_NAMES:
+        setattr(lod_props, name, getattr(lod_xml, name))
 
 
 def set_archetype_properties(arch_xml: Archetype, arch_props: FragArchetypeProperties):
-    arch_props.name = arch_xml.name
-    arch_props.unknown_48 = arch_xml.unknown_48
-    arch_props.unknown_4c = arch_xml.unknown_4c
-    arch_props.unknown_50 = arch_xml.unknown_50
-    arch_props.unknown_54 = arch_xml.unknown_54
-    arch_props.inertia_tensor = arch_xml.inertia_tensor
+    for name in ARCHETYPE_PROP_NAMES:
+        setattr(arch_props, name, getattr(arch_xml, name))
 
 
 def set_group_properties(group_xml: PhysicsGroup, bone: bpy.types.Bone):
-    bone.group_properties.name = group_xml.name
-    bone.group_properties.glass_window_index = group_xml.glass_window_index
-    bone.group_properties.glass_flags = group_xml.glass_flags
-    bone.group_properties.strength = group_xml.strength
-    bone.group_properties.force_transmission_scale_up = group_xml.force_transmission_scale_up
-    bone.group_properties.force_transmission_scale_down = group_xml.force_transmission_scale_down
-    bone.group_properties.joint_stiffness = group_xml.joint_stiffness
-    bone.group_properties.min_soft_angle_1 = group_xml.min_soft_angle_1
-    bone.group_properties.max_soft_angle_1 = group_xml.max_soft_angle_1
-    bone.group_properties.max_soft_angle_2 = group_xml.max_soft_angle_2
-    bone.group_properties.max_soft_angle_3 = group_xml.max_soft_angle_3
-    bone.group_properties.rotation_speed = group_xml.rotation_speed
-    bone.group_properties.rotation_strength = group_xml.rotation_strength
-    bone.group_properties.restoring_max_torque = group_xml.restoring_max_torque
-    bone.group_properties.latch_strength = group_xml.latch_strength
-    bone.group_properties.min_damage_force = group_xml.min_damage_force
-    bone.group_properties.damage_health = group_xml.damage_health
-    bone.group_properties.unk_float_5c = group_xml.unk_float_5c
-    bone.group_properties.unk_float_60 = group_xml.unk_float_60
-    bone.group_properties.unk_float_64 = group_xml.unk_float_64
-    bone.group_properties.unk_float_68 = group_xml.unk_float_68
-    bone.group_properties.unk_float_6c = group_xml.unk_float_6c
-    bone.group_properties.unk_float_70 = group_xml.unk_float_70
-    bone.group_properties.unk_float_74 = group_xml.unk_float_74
-    bone.group_properties.unk_float_78 = group_xml.unk_float_78
-    bone.group_properties.unk_float_a8 = group_xml.unk_float_a8
+    group_props = bone.group_properties
+    group_props.name = group_xml.name
+
+    for name in GROUP_PROP_NAMES:
+        setattr(group_props, name, getattr(group_xml, name))
 
 
 def set_veh_window_properties(window_xml: Window, window_obj: bpy.types.Object):
-    window_obj.vehicle_window_properties.unk_float_17 = window_xml.unk_float_17
-    window_obj.vehicle_window_properties.unk_float_18 = window_xml.unk_float_18
-    window_obj.vehicle_window_properties.cracks_texture_tiling = window_xml.cracks_texture_tiling
+    window_props = window_obj.vehicle_window_properties
+
+    for name in VEH_WINDOW_PROP_NAMES:
+        setattr(window_props, name, getattr(window_xml, name))